@@ -1,6 +1,8 @@
 import streamlit as st
-from customer_app import customer_satisfaction_prediction  # Import function from customer_app.py
-from flight_app import flight_price_prediction            # Import function from flight_app.py
+from model_registry import get_registry
+
+# Page modules (and the ML/plotting libraries they pull in) are imported
+# the first time their page is visited, not at startup.
 
 # Custom CSS for a professional look and feel
 st.markdown("""
@@ -130,6 +132,7 @@ elif st.session_state.page == "Project Selection":
 elif st.session_state.page == "Customer Satisfaction Prediction":
     st.markdown("<div class='subheader'>Customer Satisfaction Prediction</div>", unsafe_allow_html=True)
     st.markdown("<p class='content-text'>You can predict customer satisfaction using this app.</p>", unsafe_allow_html=True)
+    from customer_app import customer_satisfaction_prediction  # Import function from customer_app.py
     customer_satisfaction_prediction()  # Call the function from customer_app.py
 
     # Add a 'Back to Project Selection' button
@@ -140,11 +143,15 @@ elif st.session_state.page == "Customer Satisfaction Prediction":
 elif st.session_state.page == "Flight Price Prediction":
     st.markdown("<div class='subheader'>Flight Price Prediction</div>", unsafe_allow_html=True)
     st.markdown("<p class='content-text'>You can estimate flight prices using this app.</p>", unsafe_allow_html=True)
+    from flight_app import flight_price_prediction  # Import function from flight_app.py
     flight_price_prediction()  # Call the function from flight_app.py
 
     # Add a 'Back to Project Selection' button
     if st.button("⬅️ Back to Project Selection", key="back_to_selection_2"):
         st.session_state.page = "Project Selection"
 
+# Load the pinned models in the background once per process, after the first page has drawn
+get_registry().warm_up_async()
+
 # Footer for a professional touch
 #st.markdown("<div class='footer'>Powered by Streamlit | © 2025 Your Company</div>", unsafe_allow_html=True)
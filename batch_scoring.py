@@ -0,0 +1,137 @@
+import argparse
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from explain import TreeExplainer, field_contributions, get_explainer
+from flight_cleaning import clean_chunk
+from features import CUSTOMER_ENCODER, FLIGHT_ENCODER, customer_features, flight_features
+from model_registry import CUSTOMER_MODEL, FLIGHT_MODEL, get_registry
+from prediction_cache import cached_model
+
+DEFAULT_CHUNKSIZE = 10_000
+
+
+def add_contributions(scored, explainer, encoder, X, label=None):
+    """Append the base value and one ``<field>_Contribution`` column per raw input field."""
+    bias, contributions = explainer.explain(X, label)
+    fields, grouped = field_contributions(contributions, encoder)
+    scored['Base_Value'] = bias
+    for field, values in zip(fields, grouped.T):
+        scored[f'{field}_Contribution'] = values
+    return scored
+
+
+def score_flight_chunk(model, chunk, out=None, explainer=None):
+    # Raw Flight_Price.csv rows go through the same cleaning as the training data
+    if 'Date_of_Journey' in chunk:
+        chunk = clean_chunk(chunk)
+    X = flight_features(chunk, out)
+    scored = chunk.copy()
+    scored['Predicted_Price'] = model.predict(X)
+    if explainer is not None:
+        add_contributions(scored, explainer, FLIGHT_ENCODER, X)
+    return scored
+
+
+def score_customer_chunk(model, chunk, out=None, explainer=None):
+    # A single predict_proba pass gives both the label and its probability
+    X = customer_features(chunk, out)
+    proba = model.predict_proba(X)
+    satisfied = list(model.classes_).index(1)
+    scored = chunk.copy()
+    scored['Predicted_Satisfaction'] = model.classes_[proba.argmax(axis=1)]
+    scored['Satisfaction_Probability'] = proba[:, satisfied]
+    if explainer is not None:
+        # Contributions to the satisfaction probability
+        add_contributions(scored, explainer, CUSTOMER_ENCODER, X, label=1)
+    return scored
+
+
+SCORERS = {
+    'flight': (FLIGHT_MODEL, FLIGHT_ENCODER, score_flight_chunk),
+    'customer': (CUSTOMER_MODEL, CUSTOMER_ENCODER, score_customer_chunk),
+}
+
+
+def iter_scored_chunks(kind, source, chunksize=DEFAULT_CHUNKSIZE, model=None, use_cache=True, explain=True):
+    """Yield scored DataFrames for ``source`` (path or file object), one chunk at a time.
+
+    With ``explain`` each row also gets its per-field contributions.
+    """
+    model_name, encoder, score_chunk = SCORERS[kind]
+    explainer = None
+    if model is None:
+        registry = get_registry()
+        model = cached_model(registry, model_name) if use_cache else registry.get(model_name)
+        if explain:
+            explainer = get_explainer(registry, model_name)
+    elif explain:
+        explainer = TreeExplainer(model)
+    if explain and explainer is None:
+        raise ValueError(f"The {kind} model is not a tree ensemble and cannot be explained.")
+    # The customer model must carry the column schema it was trained with
+    model = encoder.predictor(model, require_schema=kind == 'customer')
+    # One feature buffer is reused for every chunk
+    buffer = np.empty((chunksize, encoder.n_features))
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        yield score_chunk(model, chunk, buffer[:len(chunk)], explainer)
+
+
+def score_csv(kind, source, destination, chunksize=DEFAULT_CHUNKSIZE, model=None, use_cache=True, explain=True):
+    """Score a CSV chunk by chunk and append each chunk to ``destination``.
+
+    Only one chunk is held in memory at a time, so memory use does not grow
+    with the size of the input file. Returns the number of rows scored.
+    """
+    rows = 0
+    owns_file = isinstance(destination, str)
+    out = open(destination, 'w', newline='') if owns_file else destination
+    try:
+        for scored in iter_scored_chunks(kind, source, chunksize, model, use_cache, explain):
+            scored.to_csv(out, header=rows == 0, index=False)
+            rows += len(scored)
+    finally:
+        if owns_file:
+            out.close()
+    return rows
+
+
+def batch_scoring_section(kind):
+    """Streamlit upload widget that scores a CSV and offers the result for download."""
+    import streamlit as st
+
+    uploaded = st.file_uploader("Upload a CSV to score", type="csv", key=f"batch_{kind}")
+    explain = st.checkbox("Include feature contributions", value=True, key=f"batch_explain_{kind}")
+    if uploaded is not None and st.button("Score File", key=f"batch_score_{kind}"):
+        # Scored chunks go to disk, not memory; the file is removed once handed to Streamlit
+        with tempfile.NamedTemporaryFile('w+', suffix='.csv', newline='') as output:
+            with st.spinner('Scoring file...'):
+                # Uploaded rows are mostly unique and would only flush the interactive prediction cache
+                rows = score_csv(kind, uploaded, output, use_cache=False, explain=explain)
+            st.success(f"Scored {rows} rows.")
+            output.seek(0)
+            st.download_button("Download Predictions", output,
+                               file_name=f"{kind}_predictions.csv", mime="text/csv")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV file with the flight price or customer satisfaction model.")
+    parser.add_argument("kind", choices=sorted(SCORERS), help="Which model to score with.")
+    parser.add_argument("input", help="CSV file to score.")
+    parser.add_argument("output", help="Where to write the scored CSV.")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk.")
+    parser.add_argument("--no-cache", action="store_true", help="Skip the prediction cache (for files of unique rows).")
+    parser.add_argument("--no-explain", action="store_true", help="Leave out the per-field contribution columns.")
+    args = parser.parse_args(argv)
+
+    rows = score_csv(args.kind, args.input, args.output, args.chunksize,
+                     use_cache=not args.no_cache, explain=not args.no_explain)
+    print(f"Scored {rows} rows into {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""Inference benchmark for the flight price and customer satisfaction models.
+
+Times every stage of the request path separately -- encoding raw inputs,
+``predict``, ``predict_proba``, feature contributions and the charts drawn
+after a prediction --
+for batch sizes from 1 to 100k rows, and reports latency percentiles,
+throughput and the process's peak RSS.
+
+Models are the pinned MLflow runs (``--fixture`` trains small synthetic
+ones instead) and are called directly, without the prediction cache.
+With ``--baseline`` the run is compared to an earlier ``--json`` result
+and exits with status 1 when a stage's p50 regressed by more than
+``--max-regression``.
+"""
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import CUSTOMER_ENCODER, CUSTOMER_FEATURE_COLUMNS, FLIGHT_ENCODER, FLIGHT_FEATURE_COLUMNS
+from flight_cleaning import AIRLINE_VOCAB, DESTINATION_VOCAB, SOURCE_VOCAB
+
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000]
+# Stages faster than this are too noisy to flag as regressions
+MIN_REGRESSION_MS = 0.05
+
+CUSTOMER_VALUES = {
+    'Gender': ['Male', 'Female'],
+    'Customer Type': ['Loyal Customer', 'disloyal Customer'],
+    'Type of Travel': ['Business travel', 'Personal Travel'],
+    'Class': ['Business', 'Eco', 'Eco Plus'],
+}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, kilobytes elsewhere
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def flight_inputs(n, rng):
+    """Raw flight inputs as entered on the page (or found in cleaned_flight_price.csv)."""
+    return pd.DataFrame({
+        'Airline': rng.choice(AIRLINE_VOCAB, n),
+        'Source': rng.choice(SOURCE_VOCAB, n),
+        'Destination': rng.choice(DESTINATION_VOCAB, n),
+        'Duration': rng.randint(60, 1500, n),
+        'Total_Stops': rng.randint(0, 4, n),
+        'Day_of_Journey': rng.randint(1, 31, n),
+        'Month_of_Journey': rng.randint(3, 7, n),
+        'Dep_Hour': rng.randint(0, 24, n),
+        'Dep_Minute': rng.randint(0, 60, n),
+        'Arrival_Hour': rng.randint(0, 24, n),
+        'Arrival_Minute': rng.randint(0, 60, n),
+    })
+
+
+def customer_inputs(n, rng):
+    """Raw customer inputs with the columns of cleaned_customer.csv."""
+    frame = pd.DataFrame({field: rng.choice(values, n) for field, values in CUSTOMER_VALUES.items()})
+    for column in CUSTOMER_ENCODER.numeric:
+        frame[column] = rng.randint(0, 6, n)
+    frame['Age'] = rng.randint(7, 86, n)
+    frame['Flight Distance'] = rng.randint(31, 5000, n)
+    return frame
+
+
+def fixture_setup(rng):
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestClassifier
+
+    from price_summary import PriceSummary
+
+    flight = flight_inputs(20_000, rng)
+    X_flight = FLIGHT_ENCODER.encode(flight)
+    y_flight = 3000 + 4 * flight['Duration'] + 2500 * flight['Total_Stops'] + rng.normal(0, 500, len(flight))
+    customer = customer_inputs(20_000, rng)
+    X_customer = CUSTOMER_ENCODER.encode(customer)
+    y_customer = (customer['Online boarding'] + customer['Inflight wifi service'] + rng.normal(0, 1, len(customer)) > 5)
+
+    flight_model = GradientBoostingRegressor(n_estimators=300, max_depth=5, random_state=0)
+    flight_model.fit(pd.DataFrame(X_flight, columns=FLIGHT_FEATURE_COLUMNS), y_flight)
+    customer_model = RandomForestClassifier(n_estimators=100, n_jobs=-1, random_state=0)
+    customer_model.fit(pd.DataFrame(X_customer, columns=CUSTOMER_FEATURE_COLUMNS), y_customer.astype(int))
+    summary = PriceSummary.from_frame(flight.assign(Price=y_flight))
+    return flight_model, customer_model, summary, (X_flight, y_flight)
+
+
+def registry_setup():
+    from data_store import ENCODED_FLIGHT_STORE, read_frame
+    from model_registry import CUSTOMER_MODEL, FLIGHT_MODEL, get_registry
+    from price_summary import get_price_summary
+
+    registry = get_registry()
+    encoded = read_frame(ENCODED_FLIGHT_STORE)
+    training = (encoded[FLIGHT_FEATURE_COLUMNS].to_numpy(np.float64), encoded['Price'].to_numpy())
+    return registry.get(FLIGHT_MODEL), registry.get(CUSTOMER_MODEL), get_price_summary(), training
+
+
+def booster_candidates(reference, X, y):
+    """LightGBM/XGBoost regressors with the GB model's size, for whichever is installed."""
+    params = {'n_estimators': reference.n_estimators, 'max_depth': reference.max_depth,
+              'learning_rate': reference.learning_rate}
+    candidates = {}
+    try:
+        from lightgbm import LGBMRegressor
+        candidates['flight_price[lightgbm]'] = LGBMRegressor(verbose=-1, **params).fit(X, y)
+    except ImportError:
+        print("lightgbm is not installed; skipping")
+    try:
+        from xgboost import XGBRegressor
+        candidates['flight_price[xgboost]'] = XGBRegressor(**params).fit(X, y)
+    except ImportError:
+        print("xgboost is not installed; skipping")
+    return candidates
+
+
+def measure(fn, arg, repeat):
+    times = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def stats(times, batch_size):
+    p50, p95, p99 = np.percentile(times * 1000, [50, 95, 99])
+    return {'runs': len(times), 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+            'rows_per_s': batch_size / times.mean(), 'peak_rss_mb': peak_rss_mb()}
+
+
+def bench_model(name, encoder, make_inputs, model, batch_sizes, repeat, rng):
+    """Encoding, model and explanation stages of one model for every batch size."""
+    from explain import TreeExplainer
+
+    # As served: checked against the encoder, without the column names
+    model = encoder.predictor(model)
+    try:
+        explainer = TreeExplainer(model)
+    except TypeError:
+        explainer = None
+    results = {}
+    for batch_size in batch_sizes:
+        raw = make_inputs(batch_size, rng)
+        if batch_size == 1:
+            # A single prediction from the pages encodes one dict of inputs
+            raw = raw.iloc[0].to_dict()
+        runs = max(3, min(repeat, 100_000 // batch_size))
+        stages = {'encode': (encoder.encode, raw)}
+        X = encoder.encode(raw)
+        stages['predict'] = (model.predict, X)
+        if getattr(model, 'classes_', None) is not None:
+            stages['predict_proba'] = (model.predict_proba, X)
+        if explainer is not None:
+            stages['explain'] = (explainer.explain, X)
+        for stage, (fn, arg) in stages.items():
+            fn(arg)   # warm-up
+            result = stats(measure(fn, arg, runs), batch_size)
+            results.setdefault(stage, {})[str(batch_size)] = result
+            print(f"{name:<24} {stage:<14} {batch_size:>7}  p50 {result['p50_ms']:10.3f} ms  "
+                  f"p99 {result['p99_ms']:10.3f} ms  {result['rows_per_s']:12.0f} rows/s  "
+                  f"peak RSS {result['peak_rss_mb']:7.1f} MB")
+    return results
+
+
+def bench_charts(charts, repeat):
+    results = {}
+    for name, (fn, arg) in charts.items():
+        try:
+            fn(arg)
+        except ImportError as exc:
+            print(f"chart {name}: skipped ({exc})")
+            continue
+        results[name] = {'1': stats(measure(fn, arg, repeat), 1)}
+        print(f"chart {name:<30} p50 {results[name]['1']['p50_ms']:10.3f} ms")
+    return results
+
+
+def regressions(results, baseline, max_regression):
+    """(model, stage, batch size, old p50, new p50) for every slower stage."""
+    slower = []
+    for model, stages in results.items():
+        for stage, sizes in stages.items():
+            for size, result in sizes.items():
+                old = baseline.get(model, {}).get(stage, {}).get(size)
+                if old is None:
+                    continue
+                limit = old['p50_ms'] * (1 + max_regression) + MIN_REGRESSION_MS
+                if result['p50_ms'] > limit:
+                    slower.append((model, stage, size, old['p50_ms'], result['p50_ms']))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixture', action='store_true', help="Use synthetic models instead of the pinned runs.")
+    parser.add_argument('--batch-sizes', type=int, nargs='*', default=BATCH_SIZES)
+    parser.add_argument('--repeat', type=int, default=50, help="Runs per stage (fewer for large batches).")
+    parser.add_argument('--compiled', action='store_true', help="Also time the tree_compile engine.")
+    parser.add_argument('--boosters', action='store_true',
+                        help="Also time LightGBM/XGBoost regressors fitted like the flight model.")
+    parser.add_argument('--json', help="Write the results to this file.")
+    parser.add_argument('--baseline', help="Earlier --json result to compare against.")
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help="Allowed relative p50 slowdown per stage against the baseline.")
+    args = parser.parse_args(argv)
+
+    rng = np.random.RandomState(0)
+    setup = fixture_setup(rng) if args.fixture else registry_setup()
+    flight_model, customer_model, summary, (X_train, y_train) = setup
+
+    models = {'flight_price': (FLIGHT_ENCODER, flight_inputs, flight_model),
+              'customer_satisfaction': (CUSTOMER_ENCODER, customer_inputs, customer_model)}
+    if args.compiled:
+        # Served the way a model bundle serves them (compiled trees, scaler applied first)
+        from model_bundle import BundledModel, export_model
+        models['flight_price[compiled]'] = (FLIGHT_ENCODER, flight_inputs,
+                                            BundledModel('flight_price', export_model('fixture', None, flight_model)))
+        models['customer_satisfaction[compiled]'] = (
+            CUSTOMER_ENCODER, customer_inputs,
+            BundledModel('customer_satisfaction', export_model('fixture', None, customer_model)))
+    if args.boosters:
+        for name, model in booster_candidates(flight_model, X_train, y_train).items():
+            models[name] = (FLIGHT_ENCODER, flight_inputs, model)
+
+    results = {}
+    for name, (encoder, make_inputs, model) in models.items():
+        results[name] = bench_model(name, encoder, make_inputs, model, args.batch_sizes, args.repeat, rng)
+
+    # The apps' renderers, called directly (uncached); st.plotly_chart serializes figures to JSON
+    from chart_rendering import contribution_bar, price_histogram, satisfaction_pie
+    row = CUSTOMER_ENCODER.encode(customer_inputs(1, rng))
+    contributions = rng.normal(0, 0.05, len(CUSTOMER_ENCODER.field_indices()))
+    results['charts'] = bench_charts({
+        'flight price histogram': (lambda price: price_histogram(summary.edges, summary.counts, price).to_json(),
+                                   10_000),
+        'satisfaction pie': (satisfaction_pie, CUSTOMER_ENCODER.predictor(customer_model).predict_proba(row)[0]),
+        'contribution bar chart': (lambda values: contribution_bar(list(CUSTOMER_ENCODER.field_indices()),
+                                                                   values).to_json(), contributions),
+    }, min(args.repeat, 20))
+
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'models': 'fixture' if args.fixture else 'registry',
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'peak_rss_mb': peak_rss_mb(),
+        },
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)['results']
+        slower = regressions(results, baseline, args.max_regression)
+        for model, stage, size, old, new in slower:
+            print(f"REGRESSION {model} {stage} batch {size}: p50 {old:.3f} ms -> {new:.3f} ms")
+        if slower:
+            return 1
+        print(f"No stage slower than the baseline by more than {args.max_regression:.0%}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
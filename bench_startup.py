@@ -0,0 +1,96 @@
+"""Cold-start benchmark for the Streamlit app.
+
+Every measurement runs in a fresh interpreter so nothing is already imported:
+
+* import time of each module the app loads, and
+* time to first render of each page (through Streamlit's AppTest runner).
+
+Exits with status 1 when a median is above the ``--max-import-ms`` /
+``--max-render-ms`` limits, so it can guard cold-start regressions in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = ['streamlit', 'model_registry', 'customer_app', 'flight_app']
+PAGES = ['Introduction', 'Project Selection', 'Customer Satisfaction Prediction', 'Flight Price Prediction']
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+RENDER_SNIPPET = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file('app.py', default_timeout=120)
+at.session_state['page'] = {page!r}
+at.run()
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(len(at.exception))
+"""
+
+
+def _run(snippet):
+    root = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, '-c', snippet], cwd=root,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def measure_import(module, repeat):
+    return [float(_run(IMPORT_SNIPPET.format(module=module))[-1]) * 1000 for _ in range(repeat)]
+
+
+def measure_render(page, repeat):
+    times, errors = [], 0
+    for _ in range(repeat):
+        elapsed, n_exceptions = _run(RENDER_SNIPPET.format(page=page))[-2:]
+        times.append(float(elapsed) * 1000)
+        errors = max(errors, int(n_exceptions))
+    return times, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help="Cold runs per measurement.")
+    parser.add_argument('--max-import-ms', type=float, help="Fail if a module import median is slower.")
+    parser.add_argument('--max-render-ms', type=float, help="Fail if a page's first render median is slower.")
+    parser.add_argument('--pages', nargs='*', default=PAGES)
+    parser.add_argument('--json', help="Also write the results to this file.")
+    args = parser.parse_args(argv)
+
+    results = {'imports': {}, 'renders': {}}
+    failed = False
+
+    for module in MODULES:
+        median = statistics.median(measure_import(module, args.repeat))
+        results['imports'][module] = median
+        over = args.max_import_ms is not None and median > args.max_import_ms
+        failed |= over
+        print(f"import {module:<20} {median:9.1f} ms{'  OVER LIMIT' if over else ''}")
+
+    for page in args.pages:
+        times, errors = measure_render(page, args.repeat)
+        median = statistics.median(times)
+        results['renders'][page] = {'median_ms': median, 'exceptions': errors}
+        over = args.max_render_ms is not None and median > args.max_render_ms
+        failed |= over
+        note = f"  ({errors} exception(s) on page)" if errors else ''
+        print(f"render {page:<34} {median:9.1f} ms{'  OVER LIMIT' if over else ''}{note}")
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Parity check and latency benchmark: sklearn vs the compiled tree engine.
+
+For each model the compiled ensemble (float64 and float32) is checked
+against sklearn on the given rows, then single-row and 10k-row latency are
+timed. Exits with status 1 if a parity check fails.
+"""
+import argparse
+import pickle
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from tree_compile import check_parity, compile_ensemble
+
+
+def _time(fn, X, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def fixture_models(n_rows=10_000, seed=0):
+    """Small models with the served layouts, for machines without the MLflow runs."""
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestClassifier
+
+    from features import CUSTOMER_FEATURE_COLUMNS, FLIGHT_FEATURE_COLUMNS
+
+    rng = np.random.RandomState(seed)
+    X_flight = rng.randint(0, 60, size=(n_rows, len(FLIGHT_FEATURE_COLUMNS))).astype(np.float64)
+    y_flight = X_flight[:, 0] * 20 + X_flight[:, 1] * 500 + rng.normal(0, 100, n_rows)
+    X_customer = rng.randint(0, 6, size=(n_rows, len(CUSTOMER_FEATURE_COLUMNS))).astype(np.float64)
+    y_customer = (X_customer[:, 7] + X_customer[:, 9] + rng.normal(0, 1, n_rows) > 5).astype(int)
+
+    gb = GradientBoostingRegressor(n_estimators=300, max_depth=5, random_state=seed).fit(X_flight, y_flight)
+    rf = RandomForestClassifier(n_estimators=300, max_depth=30, random_state=seed).fit(X_customer, y_customer)
+    return {'flight_price': (gb, X_flight), 'customer_satisfaction': (rf, X_customer)}
+
+
+def registry_models(n_rows=10_000):
+    from data_store import ENCODED_FLIGHT_STORE, read_frame
+    from features import CUSTOMER_FEATURE_COLUMNS, FLIGHT_FEATURE_COLUMNS
+    from model_bundle import split_scaler
+    from model_registry import CUSTOMER_MODEL, FLIGHT_MODEL, get_registry
+    from train import CUSTOMER_DATA
+
+    registry = get_registry()
+    flight = read_frame(ENCODED_FLIGHT_STORE, FLIGHT_FEATURE_COLUMNS).to_numpy(np.float64)
+    customer = read_frame(CUSTOMER_DATA)[CUSTOMER_FEATURE_COLUMNS].fillna(0).to_numpy(np.float64)
+    models = {}
+    for name, X in ((FLIGHT_MODEL, flight[:n_rows]), (CUSTOMER_MODEL, customer[:n_rows])):
+        # The engine compiles the trees; a pipeline's scaler is applied to the inputs up front
+        scaler, model = split_scaler(registry.get(name))
+        models[name] = (model, X if scaler is None else scaler.transform(X))
+    return models
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixture', action='store_true', help="Use synthetic models instead of the pinned runs.")
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    models = fixture_models(args.rows) if args.fixture else registry_models(args.rows)
+    failed = False
+    for name, (model, X) in models.items():
+        method = 'predict_proba' if hasattr(model, 'predict_proba') else 'predict'
+        print(f"{name} ({type(model).__name__}, {len(X)} rows, sklearn pickle {len(pickle.dumps(model)) / 1e6:.1f} MB)")
+        print(f"  {'engine':<18}{'1 row (ms)':>12}{f'{len(X)} rows (ms)':>18}{'arrays (MB)':>14}{'max |diff|':>14}")
+        print(f"  {'sklearn':<18}{_time(getattr(model, method), X[:1], args.repeat):12.3f}"
+              f"{_time(getattr(model, method), X, max(1, args.repeat // 5)):18.1f}")
+
+        for label, float32 in (('compiled float64', False), ('compiled float32', True)):
+            compiled = compile_ensemble(model, float32=float32)
+            try:
+                diff = check_parity(model, compiled, X, rtol=1e-4 if float32 else 1e-6,
+                                    atol=1e-2 if float32 else 1e-6)
+            except AssertionError as exc:
+                failed = True
+                diff = float('nan')
+                print(f"  parity FAILED for {label}: {exc}")
+            fn = getattr(compiled, method)
+            print(f"  {label:<18}{_time(fn, X[:1], args.repeat):12.3f}"
+                  f"{_time(fn, X, max(1, args.repeat // 5)):18.1f}{compiled.nbytes / 1e6:14.1f}{diff:14.2e}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Rendered charts kept per process, shared by every session
+MAX_CHARTS = int(os.environ.get("CHART_CACHE_SIZE", "256"))
+CHART_WORKERS = int(os.environ.get("CHART_WORKERS", "2"))
+
+
+def data_key(*parts):
+    """Hash of the data a chart is drawn from (arrays by content, anything else by repr)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(str(part.dtype).encode() + str(part.shape).encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b'\0')
+    return digest.digest()
+
+
+# Renderers: plain functions of the chart data, so their output can be cached
+
+def satisfaction_pie(proba):
+    """PNG of the dissatisfied/satisfied probability pie."""
+    # A bare Figure is never registered with pyplot, so nothing outlives this call
+    # and worker threads do not share pyplot's global state
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(5, 5))
+    ax = fig.subplots()
+    ax.pie(proba, labels=['Dissatisfied', 'Satisfied'], autopct='%1.1f%%', startangle=90,
+           colors=["#ff6666", "#66b3ff"])
+    ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    fig.clear()
+    return buffer.getvalue()
+
+
+def price_histogram(edges, counts, price):
+    """Plotly histogram of the dataset's prices with the predicted ``price`` marked."""
+    import plotly.express as px
+
+    centers = (edges[:-1] + edges[1:]) / 2
+    fig = px.bar(x=centers, y=counts, title='Distribution of Flight Prices',
+                 labels={'x': 'Price (₹)', 'y': 'count'})
+    fig.update_traces(width=np.diff(edges))
+    fig.add_vline(x=price, line_dash='dash', line_color='#6A4E23', annotation_text='Your flight')
+    return fig
+
+
+def contribution_bar(inputs, values):
+    """Plotly horizontal bars of per-input contributions, raising ones in blue."""
+    import pandas as pd
+    import plotly.express as px
+
+    frame = pd.DataFrame({
+        'Input': inputs,
+        'Contribution': values,
+        'Effect': np.where(values >= 0, 'raises', 'lowers'),
+    })
+    return px.bar(frame, x='Contribution', y='Input', color='Effect', orientation='h',
+                  color_discrete_map={'raises': '#1f77b4', 'lowers': '#ff7f0e'})
+
+
+def price_heatmap(table, airlines, hours):
+    """Plotly heatmap of prices by airline and departure hour."""
+    import plotly.express as px
+
+    return px.imshow(table, x=[f'{hour:02d}:00' for hour in hours], y=airlines,
+                     labels={'x': 'Departure', 'y': 'Airline', 'color': 'Price (₹)'},
+                     color_continuous_scale='YlOrBr', aspect='auto')
+
+
+class ChartRenderer:
+    """Renders charts on a background thread pool and caches them by their data.
+
+    ``render`` returns a future; the same chart name and data key give the
+    same future, so a chart is drawn once per process however many sessions
+    show it, and a chart still being drawn is not drawn twice. Plotly charts
+    are cached as figures (treated as read-only), matplotlib ones as PNG bytes.
+    """
+
+    def __init__(self, max_charts=MAX_CHARTS, max_workers=CHART_WORKERS):
+        self.max_charts = max_charts
+        self.max_workers = max_workers
+        self.hits = 0
+        self.misses = 0
+        self._charts = OrderedDict()   # (name, data key) -> future
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="charts")
+        self._lock = threading.Lock()
+
+    def render(self, name, key, fn, *args):
+        """Future of ``fn(*args)``, drawn at most once per (``name``, ``key``)."""
+        cache_key = (name, key)
+        with self._lock:
+            future = self._charts.get(cache_key)
+            if future is not None:
+                self._charts.move_to_end(cache_key)
+                self.hits += 1
+                return future
+            self.misses += 1
+            future = self._executor.submit(fn, *args)
+            self._charts[cache_key] = future
+            while len(self._charts) > self.max_charts:
+                self._charts.popitem(last=False)
+        future.add_done_callback(lambda done: self._forget_failed(cache_key, done))
+        return future
+
+    def _forget_failed(self, cache_key, future):
+        # Failed renders are retried on the next request
+        if future.exception() is None:
+            return
+        with self._lock:
+            if self._charts.get(cache_key) is future:
+                del self._charts[cache_key]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {'charts': len(self._charts), 'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / total if total else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._charts.clear()
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_chart_renderer():
+    """Process-wide chart renderer shared by both apps."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = ChartRenderer()
+        return _renderer
+
+
+def render_chart(name, key, fn, *args):
+    return get_chart_renderer().render(name, key, fn, *args)
+
+
+def _show(slot, chart):
+    if isinstance(chart, bytes):
+        slot.image(chart)
+    else:
+        slot.plotly_chart(chart)
+
+
+def deferred_chart(future):
+    """Reserve the chart's place on the page now; returns a function that fills it in.
+
+    Call the returned functions after the rest of the page is written, so
+    results show first and the charts appear as they finish rendering.
+    """
+    import streamlit as st
+
+    slot = st.empty()
+    if future.done():
+        _show(slot, future.result())
+        return lambda: None
+    slot.caption("Rendering chart...")
+    return lambda: _show(slot, future.result())
+
+
+def fill_charts(pending):
+    """Fill in the deferred charts, in page order."""
+    for fill in pending:
+        fill()
+    pending.clear()
@@ -1,13 +1,17 @@
-import pandas as pd
-import streamlit as st
-import mlflow.sklearn
 import numpy as np
-import time
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
+import streamlit as st
+from batch_scoring import batch_scoring_section
+from chart_rendering import data_key, deferred_chart, fill_charts, get_chart_renderer, render_chart, satisfaction_pie
+from explain import explanation_section, get_explainer
+from features import CUSTOMER_ENCODER, customer_features
+from model_registry import CUSTOMER_MODEL, get_registry
+from prediction_cache import cache_stats, cached_model
+from timing import get_timings, render_diagnostics
 
 def customer_satisfaction_prediction():
+    timings = get_timings('customer')
+    # Charts render in the background and are filled in once the rest of the page is written
+    pending_charts = []
 
     # Custom CSS for gradient background and improving UI
     st.markdown("""
@@ -36,14 +40,14 @@ def customer_satisfaction_prediction():
         </style>
     """, unsafe_allow_html=True)
 
-    # Cache model loading for performance improvement
-    @st.cache_resource
-    def load_model():
-        model_uri = 'runs:/90e43c8d4ded4b88bff19588c7e9225c/random_forest_model'
-        return mlflow.sklearn.load_model(model_uri)
-
-    # Load model
-    model = load_model()
+    # Get the pinned model from the shared registry (loaded once per process),
+    # behind the prediction cache so repeated inputs skip the trees. Models
+    # from train.py are a scaler + classifier pipeline, so scaling happens in
+    # the same predict_proba call; the column schema must match the encoder.
+    with timings.stage('model load'):
+        model = CUSTOMER_ENCODER.predictor(cached_model(get_registry(), CUSTOMER_MODEL), require_schema=True)
+        # Compiled once per model version for the per-prediction explanation
+        explainer = get_explainer(get_registry(), CUSTOMER_MODEL)
 
     # App title
     st.title("Customer Satisfaction Prediction")
@@ -89,31 +93,44 @@ def customer_satisfaction_prediction():
         type_of_travel = st.selectbox("Type of Travel", ["Personal Travel", "Business travel"])
         class_type = st.selectbox("Class", ["Eco", "Eco Plus"])
 
-    # Convert text-based input to numerical values
-    gender_male = 1 if gender == "Male" else 0
-    customer_type_disloyal = 1 if customer_type == "Disloyal Customer" else 0
-    type_of_travel_personal = 1 if type_of_travel == "Personal Travel" else 0
-    class_eco = 1 if class_type == "Eco" else 0
-    class_eco_plus = 1 if class_type == "Eco Plus" else 0
-
-    # Prepare input data for model
-    input_data = np.array([age, flight_distance, inflight_wifi_service, departure_convenience, ease_online_booking, 
-                           gate_location, food_drink, online_boarding, seat_comfort, inflight_entertainment, 
-                           onboard_service, leg_room_service, baggage_handling, checkin_service, inflight_service, 
-                           cleanliness, departure_delay, arrival_delay, gender_male, customer_type_disloyal, 
-                           type_of_travel_personal, class_eco, class_eco_plus]).reshape(1, -1)
+    # Encode the inputs straight into the model's training column order
+    with timings.stage('encoding'):
+        input_data = customer_features({
+            'Age': age,
+            'Flight Distance': flight_distance,
+            'Inflight wifi service': inflight_wifi_service,
+            'Departure/Arrival time convenient': departure_convenience,
+            'Ease of Online booking': ease_online_booking,
+            'Gate location': gate_location,
+            'Food and drink': food_drink,
+            'Online boarding': online_boarding,
+            'Seat comfort': seat_comfort,
+            'Inflight entertainment': inflight_entertainment,
+            'On-board service': onboard_service,
+            'Leg room service': leg_room_service,
+            'Baggage handling': baggage_handling,
+            'Checkin service': checkin_service,
+            'Inflight service': inflight_service,
+            'Cleanliness': cleanliness,
+            'Departure Delay in Minutes': departure_delay,
+            'Arrival Delay in Minutes': arrival_delay,
+            'Gender': gender,
+            'Customer Type': customer_type,
+            'Type of Travel': type_of_travel,
+            'Class': class_type
+        })
 
     # Create collapsible section for prediction
     with st.expander("Prediction Result", expanded=True):
         # Progress bar and prediction
         if st.button("Predict Satisfaction"):
-            with st.spinner('Making prediction...'):
-                time.sleep(2)
-                prediction = model.predict(input_data)
-                prediction_proba = model.predict_proba(input_data)[0]  # Get prediction probabilities
+            with st.spinner('Making prediction...'), timings.stage('inference'):
+                # One predict_proba pass gives both the probabilities and the label
+                prediction_proba = model.predict_proba(input_data)[0]
+                prediction = model.classes_[prediction_proba.argmax()]
 
             # Show Prediction Result
-            if prediction[0] == 1:
+            if prediction == 1:
                 st.success(f"Prediction: Satisfied 🟢")
                 st.markdown(f"Confidence: **{prediction_proba[1] * 100:.2f}%**")
             else:
@@ -122,29 +139,31 @@ def customer_satisfaction_prediction():
 
             # Display Prediction Probability as Pie Chart
             st.subheader("Prediction Probability")
-            labels = ['Dissatisfied', 'Satisfied']
-            sizes = [prediction_proba[0], prediction_proba[1]]  # Use actual prediction probabilities
-            fig2, ax2 = plt.subplots(figsize=(5, 5))  # Adjusted size to 5x5
-            ax2.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=["#ff6666", "#66b3ff"])
-            ax2.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
-            st.pyplot(fig2)
+            # The pie only shows one decimal, so nearby probabilities share one cached image
+            sizes = np.round(prediction_proba, 3)
+            pie = render_chart('satisfaction pie', data_key(sizes), satisfaction_pie, sizes)
+            pending_charts.append(deferred_chart(pie))
 
     # Create collapsible section for visualizations
     with st.expander("Visualizations", expanded=True):
-        # Visualization: Display Feature Inputs as a Bar Chart
-        features = ["Age", "Flight Distance", "Inflight Wifi", "Departure Convenience", "Online Booking", "Gate Location", 
-                    "Food and Drink", "Online Boarding", "Seat Comfort", "Inflight Entertainment", "Onboard Service", 
-                    "Leg Room Service", "Baggage Handling", "Checkin Service", "Inflight Service", "Cleanliness", 
-                    "Departure Delay", "Arrival Delay", "Gender", "Customer Type", "Type of Travel", "Class (Eco)", "Class (Eco Plus)"]
-
-        values = [age, flight_distance, inflight_wifi_service, departure_convenience, ease_online_booking, gate_location, 
-                  food_drink, online_boarding, seat_comfort, inflight_entertainment, onboard_service, leg_room_service, 
-                  baggage_handling, checkin_service, inflight_service, cleanliness, departure_delay, arrival_delay, gender_male, 
-                  customer_type_disloyal, type_of_travel_personal, class_eco, class_eco_plus]
-
-        feature_data = pd.DataFrame({"Feature": features, "Value": values})
-        fig = px.bar(feature_data, x="Feature", y="Value", color="Value", title="Input Features")
-        st.plotly_chart(fig)
+        # Visualization: which inputs push the satisfaction probability up or down
+        if explainer is not None:
+            st.subheader("Feature Contributions to P(Satisfied)")
+            with timings.stage('explanation'):
+                pending_charts.append(explanation_section(explainer, CUSTOMER_ENCODER, input_data,
+                                                          label=1, value_format='{:.1%}'))
+
+    # Score many customers at once from an uploaded CSV
+    with st.expander("Batch Scoring"):
+        st.markdown("Upload a CSV with the columns of `cleaned_customer.csv` to score every row.")
+        batch_scoring_section('customer')
+
+    # Optional per-stage latency panel
+    render_diagnostics(timings, 'customer', {'prediction cache': cache_stats(CUSTOMER_MODEL),
+                                             'chart cache': get_chart_renderer().stats()})
+
+    with timings.stage('chart rendering'):
+        fill_charts(pending_charts)
 
 # Run the app
 if __name__ == '__main__':
@@ -0,0 +1,142 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from flight_cleaning import (CATEGORY_VOCABS, DEFAULT_CHUNKSIZE, RAW_FLIGHT_DATA, clean_stream,
+                             encode_stream, read_chunks)
+
+CLEANED_FLIGHT_STORE = 'data/cleaned_flight_price.parquet'
+ENCODED_FLIGHT_STORE = 'data/encoded_flight_price.parquet'
+
+# Smallest dtypes that hold every value of the flight data
+NUMERIC_DTYPES = {
+    'Duration': 'int16',
+    'Total_Stops': 'uint8',
+    'Price': 'int32',
+    'Day_of_Journey': 'uint8',
+    'Month_of_Journey': 'uint8',
+    'Dep_Hour': 'uint8',
+    'Dep_Minute': 'uint8',
+    'Arrival_Hour': 'UInt8',
+    'Arrival_Minute': 'UInt8',
+}
+
+
+def compact_cleaned(cleaned):
+    """Categoricals become dictionary-encoded columns, numbers the small int types above."""
+    columns = {field: pd.Categorical(cleaned[field], categories=vocab)
+               for field, vocab in CATEGORY_VOCABS.items()}
+    frame = cleaned.assign(**columns)
+    return frame.astype({c: t for c, t in NUMERIC_DTYPES.items() if c in frame})
+
+
+def compact_encoded(encoded):
+    one_hot = [c for c in encoded.columns if c not in NUMERIC_DTYPES]
+    dtypes = {c: t for c, t in NUMERIC_DTYPES.items() if c in encoded}
+    dtypes.update((c, 'uint8') for c in one_hot)
+    return encoded.astype(dtypes)
+
+
+def write_store(source=RAW_FLIGHT_DATA, cleaned_path=CLEANED_FLIGHT_STORE,
+                encoded_path=ENCODED_FLIGHT_STORE, chunksize=DEFAULT_CHUNKSIZE):
+    """Run the cleaning pipeline on ``source`` and write both datasets as Parquet.
+
+    Chunks are appended as row groups, so memory stays bounded by ``chunksize``.
+    Both files are written under temporary names and only moved into place
+    once complete, so readers never see a partial file.
+    Returns the number of rows written.
+    """
+    rows = 0
+    writers = {}
+    tmp_paths = {}
+    try:
+        # Unique names, so that two processes rebuilding at once never share a file
+        for path in (cleaned_path, encoded_path):
+            fd, tmp_paths[path] = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path) or '.')
+            os.close(fd)
+        for cleaned, encoded in encode_stream(clean_stream(read_chunks(source, chunksize))):
+            for path, frame in ((cleaned_path, compact_cleaned(cleaned)), (encoded_path, compact_encoded(encoded))):
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if path not in writers:
+                    writers[path] = pq.ParquetWriter(tmp_paths[path], table.schema)
+                writers[path].write_table(table)
+            rows += len(cleaned)
+        for writer in writers.values():
+            writer.close()
+        for path in writers:
+            # mkstemp files are readable by their owner only
+            os.chmod(tmp_paths[path], 0o644)
+            os.replace(tmp_paths[path], path)
+    finally:
+        for writer in writers.values():
+            writer.close()
+        for tmp_path in tmp_paths.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return rows
+
+
+_store_lock = threading.Lock()
+
+
+def _store_is_stale(source, paths):
+    source_mtime = os.stat(source).st_mtime
+    return any(not os.path.exists(path) or os.stat(path).st_mtime < source_mtime for path in paths)
+
+
+def ensure_store(source=RAW_FLIGHT_DATA, cleaned_path=CLEANED_FLIGHT_STORE, encoded_path=ENCODED_FLIGHT_STORE):
+    """(Re)build the Parquet store if it is missing or older than the raw CSV.
+
+    Threads that find it stale at once rebuild it only once: the others wait
+    for the lock and then see the fresh files.
+    """
+    paths = (cleaned_path, encoded_path)
+    if not _store_is_stale(source, paths):
+        return False
+    with _store_lock:
+        if not _store_is_stale(source, paths):
+            return False
+        write_store(source, cleaned_path, encoded_path)
+        return True
+
+
+def read_table(path, columns=None):
+    """Memory-mapped Arrow read of only the requested columns."""
+    if path in (CLEANED_FLIGHT_STORE, ENCODED_FLIGHT_STORE):
+        ensure_store()
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+
+def read_frame(path, columns=None):
+    """Load a dataset as a DataFrame, from Parquet when available.
+
+    CSV files (like ``cleaned_customer.csv``) are still read with their
+    leading index column, so callers do not need to care about the format.
+    """
+    if path.endswith('.parquet'):
+        return read_table(path, columns).to_pandas()
+    frame = pd.read_csv(path, index_col=0)
+    return frame if columns is None else frame[columns]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Parquet store for the flight datasets.")
+    parser.add_argument("--input", default=RAW_FLIGHT_DATA)
+    parser.add_argument("--cleaned", default=CLEANED_FLIGHT_STORE)
+    parser.add_argument("--encoded", default=ENCODED_FLIGHT_STORE)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    rows = write_store(args.input, args.cleaned, args.encoded, args.chunksize)
+    print(f"Wrote {rows} rows to {args.cleaned} and {args.encoded}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
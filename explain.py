@@ -0,0 +1,97 @@
+import threading
+
+import numpy as np
+
+from model_bundle import BundledModel, split_scaler
+from prediction_cache import CachedModel
+from tree_compile import CompiledForest, compile_ensemble
+
+
+class TreeExplainer:
+    """Per-prediction feature contributions of a served tree ensemble.
+
+    Uses the tree-interpreter decomposition of the compiled ensemble:
+    ``prediction = bias + sum(contributions)``. The ensemble is compiled and
+    its bias (the expected output over the training data) computed once,
+    when the explainer is built.
+    """
+
+    def __init__(self, model):
+        if isinstance(model, CachedModel):
+            model = model.model
+        if isinstance(model, BundledModel):
+            self.transform, model = model.transform, model.model
+        else:
+            scaler, model = split_scaler(model)
+            self.transform = None if scaler is None else scaler.transform
+        self.forest = model if isinstance(model, CompiledForest) else compile_ensemble(model)
+        self.classes_ = self.forest.classes_
+        self.expected = self.forest.bias
+
+    def output_index(self, label=None):
+        """Column of the explained output: the regression value or the class ``label`` (default: the last class)."""
+        if self.classes_ is None:
+            return 0
+        return len(self.classes_) - 1 if label is None else list(self.classes_).index(label)
+
+    def explain(self, X, label=None):
+        """(bias, (n_rows, n_features) contributions) to the prediction (or P(``label``)) of each row."""
+        X = np.asarray(X, dtype=np.float64)
+        if self.transform is not None:
+            X = self.transform(X)
+        k = self.output_index(label)
+        return float(self.expected[k]), self.forest.contributions(X)[:, :, k]
+
+
+def field_contributions(contributions, encoder):
+    """Sum encoded-column contributions per raw input field (one-hot blocks become one value).
+
+    Returns the field names and an (n_rows, n_fields) array.
+    """
+    fields = encoder.field_indices()
+    grouped = np.column_stack([contributions[:, indices].sum(axis=1) for indices in fields.values()])
+    return list(fields), grouped
+
+
+_explainers = {}
+_explainers_lock = threading.Lock()
+
+
+def get_explainer(registry, name):
+    """Explainer of the model pinned under ``name``, built once per model version.
+
+    Returns None when the model is not a tree ensemble the engine can compile.
+    """
+    model, key = registry.get_with_key(name)
+    with _explainers_lock:
+        cached = _explainers.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+    try:
+        explainer = TreeExplainer(model)
+    except TypeError:
+        explainer = None
+    with _explainers_lock:
+        _explainers[name] = (key, explainer)
+    return explainer
+
+
+def explanation_section(explainer, encoder, X, label=None, value_format='{:,.2f}', top=10):
+    """Streamlit bar chart of the input fields that moved one prediction the most.
+
+    The chart is rendered in the background; returns the function that
+    fills it in (see ``chart_rendering.deferred_chart``).
+    """
+    import streamlit as st
+
+    from chart_rendering import contribution_bar, data_key, deferred_chart, render_chart
+
+    bias, contributions = explainer.explain(X, label)
+    fields, grouped = field_contributions(contributions, encoder)
+    values = grouped[0]
+    order = np.argsort(np.abs(values))[::-1][:top][::-1]   # largest at the top of the chart
+    st.markdown(f"Starting from the average prediction of **{value_format.format(bias)}**, "
+                f"these inputs moved it the most:")
+    inputs = [fields[i] for i in order]
+    chart = render_chart('contributions', data_key(inputs, values[order]), contribution_bar, inputs, values[order])
+    return deferred_chart(chart)
@@ -0,0 +1,186 @@
+import copy
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from flight_cleaning import AIRLINE_VOCAB, DESTINATION_VOCAB, SOURCE_VOCAB
+
+# Column layout of encoded_flight_price.csv (what the flight model was trained on)
+FLIGHT_NUMERIC_COLUMNS = [
+    'Duration', 'Total_Stops', 'Day_of_Journey', 'Month_of_Journey',
+    'Dep_Hour', 'Dep_Minute', 'Arrival_Hour', 'Arrival_Minute'
+]
+# One-hot columns come from the cleaning pipeline's vocabularies (minus the dropped first category)
+AIRLINES = AIRLINE_VOCAB[1:]
+SOURCES = SOURCE_VOCAB[1:]
+DESTINATIONS = DESTINATION_VOCAB[1:]
+FLIGHT_CATEGORIES = {'Airline': AIRLINES, 'Source': SOURCES, 'Destination': DESTINATIONS}
+FLIGHT_FEATURE_COLUMNS = FLIGHT_NUMERIC_COLUMNS + [
+    f'{field}_{value}' for field, values in FLIGHT_CATEGORIES.items() for value in values
+]
+
+# Column layout of cleaned_customer.csv without the target
+CUSTOMER_NUMERIC_COLUMNS = [
+    'Age', 'Flight Distance', 'Inflight wifi service', 'Departure/Arrival time convenient',
+    'Ease of Online booking', 'Gate location', 'Food and drink', 'Online boarding',
+    'Seat comfort', 'Inflight entertainment', 'On-board service', 'Leg room service',
+    'Baggage handling', 'Checkin service', 'Inflight service', 'Cleanliness',
+    'Departure Delay in Minutes', 'Arrival Delay in Minutes'
+]
+CUSTOMER_CATEGORIES = {
+    'Gender': ['Male'],
+    'Customer Type': ['disloyal Customer'],
+    'Type of Travel': ['Personal Travel'],
+    'Class': ['Eco', 'Eco Plus'],
+}
+CUSTOMER_FEATURE_COLUMNS = CUSTOMER_NUMERIC_COLUMNS + [
+    f'{field}_{value}' for field, values in CUSTOMER_CATEGORIES.items() for value in values
+]
+
+
+class FeatureEncoder:
+    """Encodes raw inputs into the column order a model was trained with.
+
+    The encoder is compiled once from the training column list: numeric
+    columns and one-hot columns (``<field>_<value>``) are mapped to their
+    position, so encoding one or many rows is a fill of a float64 buffer.
+    Values of a categorical field that have no column (the dropped
+    ``drop_first`` category or unseen values) leave all its flags at zero.
+    """
+
+    def __init__(self, columns, categorical_fields):
+        self.columns = list(columns)
+        self.categorical_fields = list(categorical_fields)
+        position = {column: i for i, column in enumerate(self.columns)}
+
+        self.categories = {}
+        for field in self.categorical_fields:
+            prefix = f'{field}_'
+            # Lookups ignore case ('Disloyal Customer' vs 'disloyal Customer')
+            self.categories[field] = {
+                column[len(prefix):].lower(): i
+                for column, i in position.items() if column.startswith(prefix)
+            }
+        one_hot = {i for lookup in self.categories.values() for i in lookup.values()}
+        self.numeric = {column: i for column, i in position.items() if i not in one_hot}
+
+        # Vectorized lookup tables for the N-row path
+        self._vocab = {field: pd.Index(list(lookup)) for field, lookup in self.categories.items()}
+        self._vocab_columns = {field: np.fromiter(lookup.values(), dtype=np.intp, count=len(lookup))
+                               for field, lookup in self.categories.items()}
+
+    @property
+    def n_features(self):
+        return len(self.columns)
+
+    def field_indices(self):
+        """Raw input field -> encoded column positions (one for numeric fields, the one-hot block otherwise)."""
+        fields = {column: [i] for column, i in self.numeric.items()}
+        for field, lookup in self.categories.items():
+            fields[field] = sorted(lookup.values())
+        return fields
+
+    def encode_row(self, row, out=None):
+        """Encode a single mapping of field -> value into a (1, n_features) array."""
+        if out is None:
+            out = np.zeros((1, self.n_features))
+        else:
+            out.fill(0.0)
+        for column, i in self.numeric.items():
+            out[0, i] = row[column]
+        for field, lookup in self.categories.items():
+            i = lookup.get(str(row[field]).lower())
+            if i is not None:
+                out[0, i] = 1.0
+        return out
+
+    def encode(self, data, out=None):
+        """Encode a DataFrame (or mapping of equal-length columns) into an (N, n_features) array.
+
+        Frames that already carry the encoded columns are only reordered.
+        """
+        if isinstance(data, Mapping) and not any(isinstance(v, (list, tuple, np.ndarray, pd.Series))
+                                                 for v in data.values()):
+            return self.encode_row(data, out)
+
+        if isinstance(data, pd.DataFrame) and set(self.columns).issubset(data.columns):
+            values = data[self.columns].to_numpy(dtype=np.float64)
+            if out is None:
+                return values
+            out[:] = values
+            return out
+
+        n_rows = len(next(iter(data.values())) if isinstance(data, Mapping) else data)
+        if out is None:
+            out = np.zeros((n_rows, self.n_features))
+        else:
+            out.fill(0.0)
+        for column, i in self.numeric.items():
+            out[:, i] = np.asarray(data[column], dtype=np.float64)
+        rows = np.arange(n_rows)
+        for field, vocab in self._vocab.items():
+            codes = vocab.get_indexer(pd.Series(data[field], copy=False).astype(str).str.lower())
+            hit = codes >= 0
+            out[rows[hit], self._vocab_columns[field][codes[hit]]] = 1.0
+        return out
+
+    def check_model(self, model, require_schema=False):
+        """Raise if ``model`` was fitted on a different column layout than the encoder produces.
+
+        Encoded arrays carry no column names, so sklearn cannot check their
+        order itself (it only warns that names are missing); this check does.
+        With ``require_schema`` a model that carries no column names is rejected too.
+        """
+        names = getattr(model, 'feature_names_in_', None)
+        if names is None:
+            if require_schema:
+                raise ValueError("Model was logged without a column schema; retrain it with train.py.")
+            n_features = getattr(model, 'n_features_in_', self.n_features)
+            if n_features != self.n_features:
+                raise ValueError(f"Model expects {n_features} features, the encoder produces {self.n_features}.")
+        elif list(names) != self.columns:
+            raise ValueError("Model was trained on a different feature layout than the encoder.")
+
+    def predictor(self, model, require_schema=False):
+        """``model`` checked with ``check_model``, ready to predict on the encoder's arrays.
+
+        sklearn warns on every predict when a model fitted on named columns
+        gets an array; once the layout is checked the names are dropped
+        (see ``without_feature_names``).
+        """
+        self.check_model(model, require_schema)
+        return without_feature_names(model)
+
+
+def without_feature_names(model):
+    """Shallow copy of ``model`` whose sklearn estimators no longer record their column names.
+
+    Pipeline steps and wrapped models (``.model``) are copied the same way;
+    fitted trees and arrays are shared with the original, which is unchanged.
+    """
+    if not hasattr(model, '__dict__'):
+        return model
+    stripped = copy.copy(model)
+    attributes = vars(stripped)
+    if hasattr(stripped, 'get_params'):
+        attributes.pop('feature_names_in_', None)
+    if 'steps' in attributes:
+        stripped.steps = [(step, without_feature_names(estimator)) for step, estimator in stripped.steps]
+    if 'model' in attributes:
+        stripped.model = without_feature_names(stripped.model)
+    return stripped
+
+
+FLIGHT_ENCODER = FeatureEncoder(FLIGHT_FEATURE_COLUMNS, FLIGHT_CATEGORIES)
+CUSTOMER_ENCODER = FeatureEncoder(CUSTOMER_FEATURE_COLUMNS, CUSTOMER_CATEGORIES)
+
+
+def flight_features(data, out=None):
+    """Flight model input built from Airline/Source/Destination and numeric fields."""
+    return FLIGHT_ENCODER.encode(data, out)
+
+
+def customer_features(data, out=None):
+    """Customer model input built from raw categorical and numeric fields."""
+    return CUSTOMER_ENCODER.encode(data, out)
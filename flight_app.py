@@ -1,9 +1,22 @@
-import pandas as pd
+import time
+
 import streamlit as st
-import mlflow.sklearn
-import plotly.express as px
+from batch_scoring import batch_scoring_section
+from chart_rendering import data_key, deferred_chart, fill_charts, get_chart_renderer, price_histogram, render_chart
+from explain import explanation_section, get_explainer
+from features import FLIGHT_ENCODER, flight_features
+from model_registry import FLIGHT_MODEL, get_registry
+from prediction_cache import cache_stats, cached_model
+from price_summary import get_price_summary
+from price_surface import get_price_surface, price_explorer_section
+from shadow_scoring import get_shadow_scorer
+from timing import get_timings, render_diagnostics
 
 def flight_price_prediction():
+    timings = get_timings('flight')
+    # Charts render in the background and are filled in once the rest of the page is written
+    pending_charts = []
+
     # Set gradient background and adjust UI colors
     st.markdown(
         """
@@ -71,9 +84,12 @@ def flight_price_prediction():
         unsafe_allow_html=True
     )
 
-    # Load model from MLflow
-    model_uri = 'runs:/752c02cb9c1041cd8eb909540372da3b/Gradient Boosting Regressor Tuning'
-    model = mlflow.sklearn.load_model(model_uri)
+    # Get the pinned model from the shared registry (loaded once per process),
+    # behind the prediction cache so repeated inputs skip the trees
+    with timings.stage('model load'):
+        model = FLIGHT_ENCODER.predictor(cached_model(get_registry(), FLIGHT_MODEL))
+        # Compiled once per model version for the per-prediction explanation
+        explainer = get_explainer(get_registry(), FLIGHT_MODEL)
 
     # Streamlit app UI
     st.title("Flight Price Prediction")
@@ -117,86 +133,76 @@ def flight_price_prediction():
     day_of_journey = date_of_journey.day
     month_of_journey = date_of_journey.month
 
-    # One-hot encoding mappings
-    airlines_map = {
-        'Air India': [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        'GoAir': [0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        'IndiGo': [0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0],
-        'Jet Airways': [0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0],
-        'Jet Airways Business': [0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0],
-        'Multiple carriers': [0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
-        'Multiple carriers Premium economy': [0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0],
-        'SpiceJet': [0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0],
-        'Trujet': [0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0],
-        'Vistara': [0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0],
-        'Vistara Premium economy': [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1]
-    }
-
-    sources_map = {
-        'Chennai': [1, 0, 0, 0],
-        'Delhi': [0, 1, 0, 0],
-        'Kolkata': [0, 0, 1, 0],
-        'Mumbai': [0, 0, 0, 1]
-    }
-
-    destinations_map = {
-        'Cochin': [1, 0, 0, 0, 0],
-        'Delhi': [0, 1, 0, 0, 0],
-        'Hyderabad': [0, 0, 1, 0, 0],
-        'Kolkata': [0, 0, 0, 1, 0],
-        'New Delhi': [0, 0, 0, 0, 1]
-    }
-
-    # Encode airline, source, and destination
-    airline_encoding = airlines_map[airline]
-    source_encoding = sources_map[source]
-    destination_encoding = destinations_map[destination]
-
-    # Create DataFrame for prediction
-    input_data = pd.DataFrame({
-        'Duration': [duration],
-        'Total_Stops': [total_stops],
-        'Day_of_Journey': [day_of_journey],
-        'Month_of_Journey': [month_of_journey],
-        'Dep_Hour': [dep_hour],
-        'Dep_Minute': [dep_minute],
-        'Arrival_Hour': [arrival_hour],
-        'Arrival_Minute': [arrival_minute],
-        'Airline_Air India': [airline_encoding[0]],
-        'Airline_GoAir': [airline_encoding[1]],
-        'Airline_IndiGo': [airline_encoding[2]],
-        'Airline_Jet Airways': [airline_encoding[3]],
-        'Airline_Jet Airways Business': [airline_encoding[4]],
-        'Airline_Multiple carriers': [airline_encoding[5]],
-        'Airline_Multiple carriers Premium economy': [airline_encoding[6]],
-        'Airline_SpiceJet': [airline_encoding[7]],
-        'Airline_Trujet': [airline_encoding[8]],
-        'Airline_Vistara': [airline_encoding[9]],
-        'Airline_Vistara Premium economy': [airline_encoding[10]],
-        'Source_Chennai': [source_encoding[0]],
-        'Source_Delhi': [source_encoding[1]],
-        'Source_Kolkata': [source_encoding[2]],
-        'Source_Mumbai': [source_encoding[3]],
-        'Destination_Cochin': [destination_encoding[0]],
-        'Destination_Delhi': [destination_encoding[1]],
-        'Destination_Hyderabad': [destination_encoding[2]],
-        'Destination_Kolkata': [destination_encoding[3]],
-        'Destination_New Delhi': [destination_encoding[4]]
-    })
+    # Encode the inputs straight into the model's training column order
+    with timings.stage('encoding'):
+        input_data = flight_features({
+            'Airline': airline,
+            'Source': source,
+            'Destination': destination,
+            'Duration': duration,
+            'Total_Stops': total_stops,
+            'Day_of_Journey': day_of_journey,
+            'Month_of_Journey': month_of_journey,
+            'Dep_Hour': dep_hour,
+            'Dep_Minute': dep_minute,
+            'Arrival_Hour': arrival_hour,
+            'Arrival_Minute': arrival_minute
+        })
 
     # Add prediction button with a spinner
     if st.button("Predict Price"):
         # Make prediction
-        predicted_price = model.predict(input_data)[0]
+        with timings.stage('inference'):
+            start = time.perf_counter()
+            predicted_price = model.predict(input_data)[0]
+        # Candidate models score the same input on background threads
+        get_shadow_scorer(FLIGHT_MODEL).submit(input_data, [predicted_price], time.perf_counter() - start)
         st.markdown(f'<div class="price-box">Estimated Price: ₹ {predicted_price:.2f}</div>', unsafe_allow_html=True)
 
-        # Load data and show visuals
-        df = pd.read_csv('data/cleaned_flight_price.csv')
+        # Show where the prediction falls in the precomputed price distribution
+        summary = get_price_summary()
+        overall = summary.percentile(predicted_price)
+        st.markdown(f"This price is higher than **{overall:.0f}%** of flights in the dataset.")
+        airline_share = summary.airline_percentile(predicted_price, airline)
+        route_share = summary.route_percentile(predicted_price, source, destination)
+        if airline_share is not None:
+            st.markdown(f"Higher than **{airline_share:.0f}%** of {airline} flights.")
+        if route_share is not None:
+            st.markdown(f"Higher than **{route_share:.0f}%** of {source} → {destination} flights.")
+
+        # Which inputs pushed the price up or down
+        if explainer is not None:
+            st.subheader("Why This Price?")
+            with timings.stage('explanation'):
+                pending_charts.append(explanation_section(explainer, FLIGHT_ENCODER, input_data,
+                                                          value_format='₹ {:,.0f}'))
 
         # Flight Price Distribution
         st.subheader("Flight Price Distribution")
-        fig = px.histogram(df, x='Price', nbins=30, title='Distribution of Flight Prices', labels={'Price': 'Price (₹)'})
-        st.plotly_chart(fig)
+        # Keyed on the distribution and the price to the rupee, so repeated prices reuse the figure
+        marker = round(float(predicted_price))
+        histogram = render_chart('price histogram', data_key(summary.edges, summary.counts, marker),
+                                 price_histogram, summary.edges, summary.counts, marker)
+        pending_charts.append(deferred_chart(histogram))
+
+    # What-if prices for the chosen date, looked up in a grid priced once per model version and date
+    with st.expander("Price Explorer"):
+        with timings.stage('price surface'):
+            surface = get_price_surface(get_registry(), FLIGHT_MODEL, day_of_journey, month_of_journey)
+        pending_charts.append(price_explorer_section(surface, source, destination, total_stops, airline))
+
+    # Score many itineraries at once from an uploaded CSV
+    with st.expander("Batch Scoring"):
+        st.markdown("Upload a CSV with the columns of `cleaned_flight_price.csv` to price every row.")
+        batch_scoring_section('flight')
+
+    # Optional per-stage latency panel
+    render_diagnostics(timings, 'flight', {'prediction cache': cache_stats(FLIGHT_MODEL),
+                                           'shadow scoring': get_shadow_scorer(FLIGHT_MODEL).stats(),
+                                           'chart cache': get_chart_renderer().stats()})
+
+    with timings.stage('chart rendering'):
+        fill_charts(pending_charts)
 
 # Call the function to run the app
 if __name__ == '__main__':
@@ -0,0 +1,134 @@
+import argparse
+import sys
+
+import pandas as pd
+
+RAW_FLIGHT_DATA = 'data/Flight_Price.csv'
+CLEANED_FLIGHT_DATA = 'data/cleaned_flight_price.csv'
+ENCODED_FLIGHT_DATA = 'data/encoded_flight_price.csv'
+DEFAULT_CHUNKSIZE = 50_000
+
+# Fixed vocabularies keep the one-hot columns identical for every chunk.
+# The first value of each is the category dropped by drop_first.
+AIRLINE_VOCAB = [
+    'Air Asia', 'Air India', 'GoAir', 'IndiGo', 'Jet Airways', 'Jet Airways Business',
+    'Multiple carriers', 'Multiple carriers Premium economy', 'SpiceJet',
+    'Trujet', 'Vistara', 'Vistara Premium economy'
+]
+SOURCE_VOCAB = ['Banglore', 'Chennai', 'Delhi', 'Kolkata', 'Mumbai']
+DESTINATION_VOCAB = ['Banglore', 'Cochin', 'Delhi', 'Hyderabad', 'Kolkata', 'New Delhi']
+CATEGORY_VOCABS = {'Airline': AIRLINE_VOCAB, 'Source': SOURCE_VOCAB, 'Destination': DESTINATION_VOCAB}
+
+STOPS = {'non-stop': 0, '1 stop': 1, '2 stops': 2, '3 stops': 3, '4 stops': 4}
+# Mode of Total_Stops in the training data; a per-chunk mode would differ between chunks
+DEFAULT_STOPS = 1.0
+
+def duration_to_minutes(durations):
+    """Vectorized version of the notebook's duration parser ('2h 50m' -> 170)."""
+    parts = durations.astype(str).str.extract(r'^\s*(?:(\d+)h)?\s*(?:(\d+)m)?').astype('float64').fillna(0)
+    return (parts[0] * 60 + parts[1]).astype('int64')
+
+
+def _clock(times):
+    # 'HH:MM' (anything after the first token, like '22 Mar', is ignored)
+    parts = times.astype(str).str.extract(r'^\s*(\d{1,2}):(\d{2})')
+    return parts[0].astype('float64'), parts[1].astype('float64')
+
+
+def clean_chunk(df):
+    """Raw Flight_Price.csv rows -> the cleaned_flight_price.csv layout.
+
+    ``Price`` is kept when present, so the same transform serves training
+    data and rows that only need scoring.
+    """
+    journey = pd.to_datetime(df['Date_of_Journey'], format='%d/%m/%Y')
+    dep_hour, dep_minute = _clock(df['Dep_Time'])
+    arrival_hour, arrival_minute = _clock(df['Arrival_Time'])
+
+    columns = {
+        'Airline': df['Airline'],
+        'Source': df['Source'],
+        'Destination': df['Destination'],
+        'Duration': duration_to_minutes(df['Duration']),
+        'Total_Stops': df['Total_Stops'].map(STOPS).astype('float64').fillna(DEFAULT_STOPS),
+        'Price': df.get('Price'),
+        'Day_of_Journey': journey.dt.day,
+        'Month_of_Journey': journey.dt.month,
+        'Dep_Hour': dep_hour.astype('int64'),
+        'Dep_Minute': dep_minute.astype('int64'),
+        # Unparseable arrival times stay missing, as with errors='coerce' in the notebook
+        'Arrival_Hour': arrival_hour.astype('Int64'),
+        'Arrival_Minute': arrival_minute.astype('Int64'),
+    }
+    if columns['Price'] is None:
+        del columns['Price']
+    return pd.DataFrame(columns, index=df.index)
+
+
+def encode_chunk(cleaned):
+    """One-hot encode a cleaned chunk against the fixed vocabularies."""
+    categorical = {field: pd.Categorical(cleaned[field], categories=vocab)
+                   for field, vocab in CATEGORY_VOCABS.items()}
+    return pd.get_dummies(cleaned.assign(**categorical), columns=list(CATEGORY_VOCABS),
+                          drop_first=True, dtype='int')
+
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE, start=0):
+    """Stage 1: stream the raw CSV with a running row index.
+
+    The first ``start`` data rows (already ingested ones) are skipped by the
+    parser, without building frames for them: the header is read on its own,
+    so one line count skips them with the header.
+    """
+    options = {}
+    if start:
+        options = {'skiprows': start + 1, 'names': pd.read_csv(path, nrows=0).columns}
+    for chunk in pd.read_csv(path, chunksize=chunksize, **options):
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+
+def clean_stream(chunks):
+    """Stage 2: clean each chunk."""
+    for chunk in chunks:
+        yield clean_chunk(chunk)
+
+
+def encode_stream(cleaned_chunks):
+    """Stage 3: yield (cleaned, encoded) pairs."""
+    for cleaned in cleaned_chunks:
+        yield cleaned, encode_chunk(cleaned)
+
+
+def run_pipeline(source=RAW_FLIGHT_DATA, cleaned_path=CLEANED_FLIGHT_DATA,
+                 encoded_path=ENCODED_FLIGHT_DATA, chunksize=DEFAULT_CHUNKSIZE):
+    """Clean and encode ``source`` chunk by chunk, appending to both outputs.
+
+    Memory use is bounded by ``chunksize`` regardless of the input size.
+    Returns the number of rows written.
+    """
+    rows = 0
+    with open(cleaned_path, 'w', newline='') as cleaned_out, open(encoded_path, 'w', newline='') as encoded_out:
+        for cleaned, encoded in encode_stream(clean_stream(read_chunks(source, chunksize))):
+            cleaned.to_csv(cleaned_out, header=rows == 0)
+            encoded.to_csv(encoded_out, header=rows == 0)
+            rows += len(cleaned)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean and one-hot encode Flight_Price.csv in chunks.")
+    parser.add_argument("--input", default=RAW_FLIGHT_DATA)
+    parser.add_argument("--cleaned", default=CLEANED_FLIGHT_DATA)
+    parser.add_argument("--encoded", default=ENCODED_FLIGHT_DATA)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    rows = run_pipeline(args.input, args.cleaned, args.encoded, args.chunksize)
+    print(f"Cleaned {rows} rows into {args.cleaned} and {args.encoded}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,271 @@
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split
+
+from features import FLIGHT_ENCODER, FLIGHT_FEATURE_COLUMNS
+from flight_cleaning import DEFAULT_CHUNKSIZE, RAW_FLIGHT_DATA, clean_stream, encode_stream, read_chunks
+from model_registry import FLIGHT_MODEL, get_registry
+from train import FLIGHT_DATA, SEARCHES, load_dataset
+
+WATERMARK_FILE = os.environ.get("FLIGHT_WATERMARK_FILE", "data/flight_watermark.json")
+EXPERIMENT = SEARCHES['flight-gb']['experiment']
+ARTIFACT_PATH = 'model'
+
+# Boosting stages (or LightGBM iterations) added per increment
+ADDED_STAGES = 50
+# Allowed relative RMSE increase on the reference and recent evaluation sets
+MAX_REGRESSION = 0.02
+# Population stability index above which a field counts as drifted
+MAX_DRIFT_PSI = 0.25
+PROFILE_BINS = 10
+# Fewer usable new rows than this are left for a later update; the 20% recent
+# holdout would be too small for its RMSE gate to mean anything
+MIN_ROWS = 500
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as fh:
+        json.dump(data, fh, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_watermark(path=WATERMARK_FILE):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+# Drift profile: per raw input field, counts over fixed bins (quantiles of the
+# initial training data for numbers, the category for one-hot blocks)
+
+def _field_bins(X, indices, edges):
+    if edges is None:
+        block = X[:, indices]
+        return np.where(block.any(axis=1), block.argmax(axis=1) + 1, 0)
+    return np.searchsorted(edges, X[:, indices[0]], side='right')
+
+
+def build_profile(X):
+    profile = {}
+    for field, indices in FLIGHT_ENCODER.field_indices().items():
+        if field in FLIGHT_ENCODER.categories:
+            edges, n_bins = None, len(indices) + 1
+        else:
+            quantiles = np.linspace(0, 1, PROFILE_BINS + 1)[1:-1]
+            edges = np.unique(np.nanquantile(X[:, indices[0]], quantiles))
+            n_bins = len(edges) + 1
+        counts = np.bincount(_field_bins(X, indices, edges), minlength=n_bins)
+        profile[field] = {'edges': None if edges is None else edges.tolist(), 'counts': counts.tolist()}
+    return profile
+
+
+def profile_counts(profile, X):
+    fields = FLIGHT_ENCODER.field_indices()
+    counts = {}
+    for field, entry in profile.items():
+        edges = None if entry['edges'] is None else np.asarray(entry['edges'])
+        counts[field] = np.bincount(_field_bins(X, fields[field], edges), minlength=len(entry['counts']))
+    return counts
+
+
+def psi(expected, actual):
+    p = np.clip(np.asarray(expected, dtype=np.float64) / max(sum(expected), 1), 1e-4, None)
+    q = np.clip(np.asarray(actual, dtype=np.float64) / max(sum(actual), 1), 1e-4, None)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def load_increment(source, start, chunksize=DEFAULT_CHUNKSIZE):
+    """Clean and encode only the raw rows after ``start``; returns (encoded frame, raw rows read)."""
+    frames = [encoded for _, encoded in encode_stream(clean_stream(read_chunks(source, chunksize, start)))]
+    if not frames:
+        return None, 0
+    encoded = pd.concat(frames)
+    return encoded, len(encoded)
+
+
+def continue_training(model, X, y, stages=ADDED_STAGES):
+    """A copy of ``model`` with ``stages`` more boosting stages fitted on (X, y)."""
+    if isinstance(model, GradientBoostingRegressor):
+        updated = copy.deepcopy(model)
+        updated.set_params(warm_start=True, n_estimators=model.n_estimators_ + stages)
+        return updated.fit(X, y)
+    booster = getattr(model, 'booster_', None)
+    if booster is not None:
+        # LightGBM continues from the existing booster
+        from lightgbm import LGBMRegressor
+        updated = LGBMRegressor(**dict(model.get_params(), n_estimators=stages))
+        return updated.fit(X, y, init_model=booster)
+    raise TypeError(f"{type(model).__name__} cannot be trained incrementally; run a full train.py search.")
+
+
+def rmse(model, X, y):
+    return float(np.sqrt(mean_squared_error(y, model.predict(X))))
+
+
+def init_watermark(source=RAW_FLIGHT_DATA, watermark_path=WATERMARK_FILE, chunksize=DEFAULT_CHUNKSIZE):
+    """Record that the served model has seen every row currently in ``source``.
+
+    Also saves the reference evaluation set (the full-training test split)
+    and the drift profile of the training data.
+    """
+    rows = sum(len(chunk) for chunk in read_chunks(source, chunksize))
+    X_train, X_test, y_train, y_test = load_dataset(FLIGHT_DATA, 'Price', FLIGHT_FEATURE_COLUMNS)
+    reference_path = os.path.splitext(watermark_path)[0] + '_reference.parquet'
+    X_test.assign(Price=y_test).to_parquet(reference_path)
+    state = {
+        'source': source,
+        'rows': rows,
+        'model_uri': get_registry().pinned_uri(FLIGHT_MODEL),
+        'reference_eval': reference_path,
+        'profile': build_profile(pd.concat([X_train, X_test]).to_numpy(np.float64)),
+        'history': [],
+    }
+    _write_json(watermark_path, state)
+    return state
+
+
+def _parent_run(mlflow):
+    mlflow.set_experiment(EXPERIMENT)
+    experiment_id = mlflow.get_experiment_by_name(EXPERIMENT).experiment_id
+    parents = mlflow.search_runs([experiment_id], output_format='list',
+                                 filter_string=f"tags.incremental_model = '{FLIGHT_MODEL}' "
+                                               f"and tags.incremental_role = 'parent'")
+    if parents:
+        return mlflow.start_run(run_id=parents[0].info.run_id)
+    return mlflow.start_run(run_name=f"{FLIGHT_MODEL} incremental",
+                            tags={'incremental_model': FLIGHT_MODEL, 'incremental_role': 'parent'})
+
+
+def run_increment(source=RAW_FLIGHT_DATA, watermark_path=WATERMARK_FILE, stages=ADDED_STAGES,
+                  max_regression=MAX_REGRESSION, max_drift=MAX_DRIFT_PSI, allow_drift=False,
+                  promote=True, chunksize=DEFAULT_CHUNKSIZE, min_rows=MIN_ROWS):
+    """Train the served flight model further on the rows appended since the watermark.
+
+    The increment is logged as a child MLflow run. It is promoted (pinned in
+    the pins file, watermark advanced) only if it does not regress on the
+    reference or the recent evaluation set and the new rows have not drifted.
+    Returns a summary dict, or None when there are no new rows. With fewer
+    than ``min_rows`` usable new rows nothing is trained and the watermark
+    stays put (the summary has ``'skipped': True``).
+    """
+    state = read_watermark(watermark_path)
+    if state is None:
+        raise FileNotFoundError(f"No watermark at {watermark_path}; run `incremental_train.py init` first.")
+    encoded, rows_read = load_increment(source, state['rows'], chunksize)
+    if not rows_read:
+        return None
+
+    # Rows with unparseable times cannot be scored; they still count as ingested
+    encoded = encoded.dropna()
+    if len(encoded) < min_rows:
+        return {'rows_read': rows_read, 'rows_usable': len(encoded), 'skipped': True, 'promoted': False}
+    X = encoded[FLIGHT_FEATURE_COLUMNS].astype(np.float64)
+    y = encoded['Price']
+    X_fit, X_recent, y_fit, y_recent = train_test_split(X, y, test_size=0.2, random_state=42)
+    reference = pd.read_parquet(state['reference_eval'])
+    X_reference, y_reference = reference[FLIGHT_FEATURE_COLUMNS].astype(np.float64), reference['Price']
+
+    registry = get_registry()
+    base_uri = registry.pinned_uri(FLIGHT_MODEL)
+    base = registry.get(FLIGHT_MODEL)
+    updated = continue_training(base, X_fit, y_fit, stages)
+
+    metrics = {
+        'rmse_reference_before': rmse(base, X_reference, y_reference),
+        'rmse_reference_after': rmse(updated, X_reference, y_reference),
+        'rmse_recent_before': rmse(base, X_recent, y_recent),
+        'rmse_recent_after': rmse(updated, X_recent, y_recent),
+    }
+    new_counts = profile_counts(state['profile'], X.to_numpy())
+    drift = {field: psi(entry['counts'], new_counts[field]) for field, entry in state['profile'].items()}
+    metrics['max_psi'] = max(drift.values())
+    checks = {
+        'reference': metrics['rmse_reference_after'] <= metrics['rmse_reference_before'] * (1 + max_regression),
+        'recent': metrics['rmse_recent_after'] <= metrics['rmse_recent_before'] * (1 + max_regression),
+        'drift': allow_drift or metrics['max_psi'] <= max_drift,
+    }
+    promoted = promote and all(checks.values())
+
+    import mlflow
+    import mlflow.sklearn
+    from mlflow.models.signature import infer_signature
+
+    with _parent_run(mlflow):
+        with mlflow.start_run(nested=True, run_name=f"increment rows {state['rows']}-{state['rows'] + rows_read}",
+                              tags={'incremental_model': FLIGHT_MODEL, 'incremental_role': 'increment',
+                                    'promoted': str(promoted)}) as child:
+            mlflow.log_params({'base_uri': base_uri, 'rows_from': state['rows'], 'rows_read': rows_read,
+                               'rows_fit': len(X_fit), 'added_stages': stages})
+            mlflow.log_metrics(metrics)
+            mlflow.log_metrics({f'psi_{field}': value for field, value in drift.items()})
+            mlflow.sklearn.log_model(updated, ARTIFACT_PATH,
+                                     signature=infer_signature(X_fit, updated.predict(X_recent[:5])))
+            uri = f"runs:/{child.info.run_id}/{ARTIFACT_PATH}"
+
+    if promoted:
+        registry.promote(FLIGHT_MODEL, uri)
+        for field, entry in state['profile'].items():
+            entry['counts'] = (np.asarray(entry['counts']) + new_counts[field]).tolist()
+        state['rows'] += rows_read
+        state['model_uri'] = uri
+        state['history'].append({'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'uri': uri, 'rows': state['rows']})
+        _write_json(watermark_path, state)
+    return {'uri': uri, 'rows_read': rows_read, 'rows_usable': len(encoded), 'skipped': False,
+            'promoted': promoted, 'checks': checks,
+            'metrics': metrics, 'drift': drift}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incremental retraining of the flight price model from newly appended rows.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    init = subparsers.add_parser('init', help="Mark every current row as ingested (after a full train.py run).")
+    update = subparsers.add_parser('update', help="Train on the rows appended since the watermark.")
+    for sub in (init, update):
+        sub.add_argument('--input', default=RAW_FLIGHT_DATA)
+        sub.add_argument('--watermark', default=WATERMARK_FILE)
+        sub.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    update.add_argument('--stages', type=int, default=ADDED_STAGES, help="Boosting stages to add.")
+    update.add_argument('--max-regression', type=float, default=MAX_REGRESSION)
+    update.add_argument('--max-drift', type=float, default=MAX_DRIFT_PSI, help="Largest allowed PSI of any field.")
+    update.add_argument('--allow-drift', action='store_true', help="Promote even if the new rows drifted.")
+    update.add_argument('--min-rows', type=int, default=MIN_ROWS,
+                        help="Least usable new rows to train on; fewer are left for a later update.")
+    update.add_argument('--no-promote', action='store_true', help="Log the increment without serving it.")
+    args = parser.parse_args(argv)
+
+    if args.command == 'init':
+        state = init_watermark(args.input, args.watermark, args.chunksize)
+        print(f"Watermark at row {state['rows']} of {args.input} for {state['model_uri']}")
+        return 0
+
+    result = run_increment(args.input, args.watermark, args.stages, args.max_regression, args.max_drift,
+                           args.allow_drift, not args.no_promote, args.chunksize, args.min_rows)
+    if result is None:
+        print("No new rows since the watermark.")
+        return 0
+    if result['skipped']:
+        print(f"Not enough new rows: {result['rows_usable']} usable of {result['rows_read']} "
+              f"(need {args.min_rows}); the watermark is unchanged.")
+        return 0
+    print(f"Trained on {result['rows_read']} new rows -> {result['uri']}")
+    for name, value in result['metrics'].items():
+        print(f"  {name}: {value:.4f}")
+    failed = [check for check, ok in result['checks'].items() if not ok]
+    print("Promoted." if result['promoted'] else f"Not promoted (failed: {', '.join(failed) or 'promotion disabled'}).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Bump when the layout of the bundle dictionary changes
+BUNDLE_FORMAT = 1
+BUNDLE_SCHEME = 'bundle:'
+BUNDLE_DIR = 'bundles'
+
+
+def bundle_uri(path, name):
+    """Registry URI of model ``name`` inside the bundle at ``path``."""
+    return f'{BUNDLE_SCHEME}{path}#{name}'
+
+
+def is_bundle_uri(uri):
+    return uri.startswith(BUNDLE_SCHEME)
+
+
+def parse_bundle_uri(uri):
+    path, _, name = uri[len(BUNDLE_SCHEME):].rpartition('#')
+    return path, name
+
+
+class BundledModel:
+    """A model served from a bundle.
+
+    Tree ensembles are held as ``CompiledForest`` node arrays (memory-mapped
+    from the bundle file, so worker processes share one copy); other models
+    are the stored estimator. Inputs are checked against the bundled column
+    schema, and standard-scaled when the model was trained on scaled inputs.
+    """
+
+    def __init__(self, name, entry):
+        self.name = name
+        self.uri = entry['uri']
+        self.checksum = entry['checksum']
+        self.n_features_in_ = entry['n_features']
+        columns = entry['columns']
+        self.feature_names_in_ = None if columns is None else np.asarray(columns, dtype=object)
+        scaler = entry['scaler']
+        self.mean, self.scale = (None, None) if scaler is None else (scaler['mean'], scaler['scale'])
+        if entry['compiled'] is not None:
+            from tree_compile import CompiledForest
+            self.model = CompiledForest.from_arrays(entry['compiled'])
+        else:
+            self.model = entry['estimator']
+        self.classes_ = getattr(self.model, 'classes_', None)
+
+    def transform(self, X):
+        if self.feature_names_in_ is not None and hasattr(X, 'columns'):
+            X = X[list(self.feature_names_in_)]
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"{self.name} expects {self.n_features_in_} features, got shape {X.shape}.")
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        return X
+
+    def predict(self, X):
+        return self.model.predict(self.transform(X))
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(self.transform(X))
+
+
+def split_scaler(model):
+    """(StandardScaler or None, final estimator) of a model or scaler+model pipeline."""
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if isinstance(model, Pipeline) and len(model.steps) == 2 and isinstance(model.steps[0][1], StandardScaler):
+        return model.steps[0][1], model.steps[1][1]
+    return None, model
+
+
+def _input_columns(model, uri):
+    names = getattr(model, 'feature_names_in_', None)
+    if names is not None:
+        return [str(name) for name in names]
+    from mlflow.models import get_model_info
+    signature = get_model_info(uri).signature
+    return None if signature is None else signature.inputs.input_names()
+
+
+def export_model(uri, checksum, model, float32=False):
+    """Bundle entry for one loaded model: compiled node arrays when possible."""
+    from tree_compile import compile_ensemble
+
+    entry = {'uri': uri, 'checksum': checksum, 'columns': _input_columns(model, uri),
+             'n_features': int(model.n_features_in_), 'scaler': None, 'compiled': None, 'estimator': None}
+    scaler, estimator = split_scaler(model)
+    try:
+        compiled = compile_ensemble(estimator, float32=float32)
+    except TypeError:
+        # Not a tree ensemble the engine knows; keep the estimator itself
+        import pickle
+        entry['estimator'] = model
+        entry['size'] = len(pickle.dumps(model))
+        return entry
+    entry['compiled'] = compiled.to_arrays()
+    entry['size'] = compiled.nbytes
+    if scaler is not None:
+        entry['scaler'] = {'mean': np.asarray(scaler.mean_, dtype=np.float64),
+                           'scale': np.asarray(scaler.scale_, dtype=np.float64)}
+    return entry
+
+
+def build_bundle(registry, names=None, output=None, float32=False):
+    """Write the models pinned in ``registry`` to one bundle file and return its path.
+
+    The version is derived from the pinned URIs and artifact checksums, so
+    rebuilding from the same runs gives the same file name.
+    """
+    import joblib
+
+    entries = {}
+    for name in names or registry.names():
+        uri = registry.pinned_uri(name)
+        if is_bundle_uri(uri):
+            raise ValueError(f"{name} is already served from a bundle ({uri}); unset MODEL_BUNDLE to rebuild.")
+        model = registry.load(uri)
+        _, checksum = registry.model_key(name)
+        entries[name] = export_model(uri, checksum, model, float32)
+
+    pins = {name: [entry['uri'], entry['checksum']] for name, entry in entries.items()}
+    version = hashlib.sha256(json.dumps([BUNDLE_FORMAT, float32, pins], sort_keys=True).encode()).hexdigest()[:12]
+    bundle = {'format': BUNDLE_FORMAT, 'version': version, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'float32': float32, 'models': entries}
+
+    output = output or os.path.join(BUNDLE_DIR, f'models-{version}.joblib')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    # Uncompressed, so that arrays can be memory-mapped on load
+    joblib.dump(bundle, output + '.tmp')
+    os.replace(output + '.tmp', output)
+    return output
+
+
+_bundles = {}
+_bundles_lock = threading.Lock()
+
+
+def open_bundle(path, mmap_mode='r'):
+    """Load a bundle once per process (again if the file changes), arrays memory-mapped."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _bundles_lock:
+        if key not in _bundles:
+            import joblib
+            bundle = joblib.load(path, mmap_mode=mmap_mode)
+            if bundle.get('format') != BUNDLE_FORMAT:
+                raise ValueError(f"{path} has bundle format {bundle.get('format')}, expected {BUNDLE_FORMAT}.")
+            for stale in [k for k in _bundles if k[0] == key[0]]:
+                del _bundles[stale]
+            _bundles[key] = bundle
+        return _bundles[key]
+
+
+def load_bundled_model(uri):
+    """(model, bundle version, size in bytes) for a ``bundle:<path>#<name>`` URI."""
+    path, name = parse_bundle_uri(uri)
+    bundle = open_bundle(path)
+    if name not in bundle['models']:
+        raise KeyError(f"{name} is not in bundle {path} (has {', '.join(bundle['models'])})")
+    entry = bundle['models'][name]
+    return BundledModel(name, entry), bundle['version'], entry['size']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Package the pinned models into an MLflow-free bundle.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Export the pinned models.")
+    build.add_argument('--output', help=f"Bundle file (default: {BUNDLE_DIR}/models-<version>.joblib).")
+    build.add_argument('--models', nargs='*', help="Registry names to include (default: all).")
+    build.add_argument('--float32', action='store_true', help="Store tree thresholds and values as float32.")
+    info = subparsers.add_parser('info', help="Describe a bundle.")
+    info.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        from model_registry import get_registry
+        path = build_bundle(get_registry(), args.models, args.output, args.float32)
+        print(f"Wrote {path} ({os.path.getsize(path) / 1e6:.1f} MB). Serve it with MODEL_BUNDLE={path}")
+        return 0
+
+    bundle = open_bundle(args.path)
+    print(f"version {bundle['version']} (format {bundle['format']}), created {bundle['created']}")
+    for name, entry in bundle['models'].items():
+        kind = 'compiled' if entry['compiled'] is not None else type(entry['estimator']).__name__
+        print(f"  {name}: {entry['uri']}\n    {kind}, {entry['n_features']} features, "
+              f"{entry['size'] / 1e6:.1f} MB, scaler: {'yes' if entry['scaler'] is not None else 'no'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from model_bundle import bundle_uri, is_bundle_uri, load_bundled_model
+
+# Names under which the apps look up their models
+FLIGHT_MODEL = "flight_price"
+CUSTOMER_MODEL = "customer_satisfaction"
+
+# Runs currently served by the apps. They can be overridden per process with
+# FLIGHT_PRICE_MODEL_URI / CUSTOMER_SATISFACTION_MODEL_URI, a model bundle (MODEL_BUNDLE)
+# or the pins file.
+DEFAULT_PINS = {
+    FLIGHT_MODEL: 'runs:/752c02cb9c1041cd8eb909540372da3b/Gradient Boosting Regressor Tuning',
+    CUSTOMER_MODEL: 'runs:/90e43c8d4ded4b88bff19588c7e9225c/random_forest_model',
+}
+
+PINS_FILE = os.environ.get("MODEL_PINS_FILE", "model_pins.json")
+MAX_MEMORY_MB = float(os.environ.get("MODEL_REGISTRY_MAX_MB", "2048"))
+# Serve every model from this bundle file (see model_bundle.py) instead of MLflow runs
+MODEL_BUNDLE = os.environ.get("MODEL_BUNDLE")
+
+
+def _artifact_files(path):
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for root, _, names in os.walk(path):
+        files.extend(os.path.join(root, name) for name in names)
+    return sorted(files)
+
+
+def artifact_checksum(path):
+    """SHA-256 over every file of a model artifact directory."""
+    digest = hashlib.sha256()
+    for file_path in _artifact_files(path):
+        digest.update(os.path.relpath(file_path, path).encode())
+        with open(file_path, 'rb') as fh:
+            for block in iter(lambda: fh.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_size(path):
+    # The pickled size on disk is a close estimate of the in-memory size of tree models
+    return sum(os.path.getsize(file_path) for file_path in _artifact_files(path))
+
+
+def _download_artifacts(uri):
+    import mlflow.artifacts
+    # For a local tracking store this returns the artifact directory in place
+    return mlflow.artifacts.download_artifacts(artifact_uri=uri)
+
+
+def _load_sklearn_model(path):
+    import mlflow.sklearn
+    return mlflow.sklearn.load_model(path)
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models.
+
+    Each model is loaded once per (run URI, artifact checksum), or per
+    (bundle URI, bundle version) for models served from a bundle. Lookups by name
+    follow the currently pinned URI, so changing a pin hot-swaps the model on
+    the next request. Loaded models are kept in LRU order and evicted once
+    their estimated size goes over ``max_memory_mb``; models currently pinned
+    under a name are kept.
+    """
+
+    def __init__(self, pins=None, pins_file=PINS_FILE, max_memory_mb=MAX_MEMORY_MB, bundle=MODEL_BUNDLE):
+        self._default_pins = dict(DEFAULT_PINS if pins is None else pins)
+        self._bundle = bundle
+        self._pins_file = pins_file
+        self._pins_file_mtime = None
+        self._file_pins = {}
+        self._max_bytes = int(max_memory_mb * 1024 * 1024)
+        self._models = OrderedDict()   # (uri, checksum) -> (model, size)
+        self._active = {}              # uri -> (uri, checksum)
+        self._loading = {}             # uri -> lock held while that URI loads
+        self._lock = threading.RLock()
+        self._warm_up_thread = None
+
+    # Pins
+
+    def _read_pins_file(self):
+        try:
+            mtime = os.stat(self._pins_file).st_mtime
+        except OSError:
+            self._pins_file_mtime, self._file_pins = None, {}
+            return self._file_pins
+        if mtime != self._pins_file_mtime:
+            with open(self._pins_file) as fh:
+                self._file_pins = json.load(fh)
+            self._pins_file_mtime = mtime
+        return self._file_pins
+
+    def pinned_uri(self, name):
+        env_uri = os.environ.get(f"{name.upper()}_MODEL_URI")
+        if env_uri:
+            return env_uri
+        if self._bundle:
+            return bundle_uri(self._bundle, name)
+        return self._read_pins_file().get(name) or self._default_pins[name]
+
+    def shadow_uris(self, name):
+        """Candidate models scored next to ``name`` without being served.
+
+        Set with ``FLIGHT_PRICE_SHADOW_URIS`` (comma-separated) or under
+        ``"shadows"`` in the pins file: ``{"shadows": {"flight_price": ["runs:/..."]}}``.
+        """
+        env_uris = os.environ.get(f"{name.upper()}_SHADOW_URIS")
+        if env_uris is not None:
+            return [uri.strip() for uri in env_uris.split(',') if uri.strip()]
+        return list(self._read_pins_file().get('shadows', {}).get(name, []))
+
+    def pin(self, name, uri):
+        """Pin ``name`` to a new run URI for this process."""
+        with self._lock:
+            self._default_pins[name] = uri
+
+    def promote(self, name, uri):
+        """Pin ``name`` to ``uri`` in the pins file, so every process serving from it switches."""
+        with self._lock:
+            pins = dict(self._read_pins_file())
+            pins[name] = uri
+            tmp_path = f"{self._pins_file}.tmp"
+            with open(tmp_path, 'w') as fh:
+                json.dump(pins, fh, indent=2)
+            os.replace(tmp_path, self._pins_file)
+
+    def names(self):
+        return list(self._default_pins)
+
+    # Loading
+
+    def _cached(self, uri):
+        # The model and its LRU position are read under one lock, so eviction cannot race us
+        with self._lock:
+            key = self._active.get(uri)
+            entry = None if key is None else self._models.get(key)
+            if entry is None:
+                return None
+            self._models.move_to_end(key)
+            return entry[0], key
+
+    def _load(self, uri):
+        """(model, key) for ``uri``.
+
+        Downloading and unpickling happen outside the registry lock, behind a
+        per-URI lock: lookups of models already loaded never wait for a load,
+        and concurrent requests for the same URI load it only once.
+        """
+        cached = self._cached(uri)
+        if cached is not None:
+            return cached
+        with self._lock:
+            uri_lock = self._loading.setdefault(uri, threading.Lock())
+        with uri_lock:
+            cached = self._cached(uri)
+            if cached is not None:
+                return cached
+
+            if is_bundle_uri(uri):
+                # Bundled models never touch MLflow; the bundle version identifies them
+                model, version, size = load_bundled_model(uri)
+                key = (uri, version)
+            else:
+                path = _download_artifacts(uri)
+                key = (uri, artifact_checksum(path))
+                with self._lock:
+                    entry = self._models.get(key)
+                model, size = entry if entry is not None else (_load_sklearn_model(path), artifact_size(path))
+
+            with self._lock:
+                if key not in self._models:
+                    self._models[key] = (model, size)
+                    self._evict(keep=key)
+                self._models.move_to_end(key)
+                self._active[uri] = key
+                return self._models[key][0], key
+
+    def load(self, uri):
+        """Return the model at ``uri``, loading it only if it is not cached yet."""
+        return self._load(uri)[0]
+
+    def get(self, name):
+        """Return the model currently pinned under ``name``."""
+        return self.load(self.pinned_uri(name))
+
+    def model_key(self, name):
+        """(uri, checksum) of the model that ``get(name)`` returns."""
+        return self._load(self.pinned_uri(name))[1]
+
+    def get_with_key(self, name):
+        """(model, (uri, checksum)) pinned under ``name``, from one lookup of the pin.
+
+        Use this rather than ``get`` and ``model_key`` when results are cached
+        by the key: a promotion between the two calls would mix versions.
+        """
+        return self._load(self.pinned_uri(name))
+
+    def refresh(self, uri):
+        """Re-check the artifact checksum of ``uri`` and reload it if it changed."""
+        with self._lock:
+            self._active.pop(uri, None)
+        return self.load(uri)
+
+    def _evict(self, keep):
+        # Models pinned for serving are never evicted to make room (e.g. for a shadow)
+        pinned = {self.pinned_uri(name) for name in self.names()}
+        total = sum(size for _, size in self._models.values())
+        for key in list(self._models):
+            if total <= self._max_bytes:
+                break
+            if key == keep or (key[0] in pinned and self._active.get(key[0]) == key):
+                continue
+            _, size = self._models.pop(key)
+            total -= size
+            if self._active.get(key[0]) == key:
+                del self._active[key[0]]
+
+    def loaded(self):
+        with self._lock:
+            return [(key, size) for key, (_, size) in self._models.items()]
+
+    # Warm-up
+
+    def warm_up(self, names=None):
+        """Load every pinned model so the first request does not pay for it."""
+        for name in names or self.names():
+            self.get(name)
+
+    def warm_up_async(self, names=None):
+        """Start warm-up once per process in a daemon thread."""
+        with self._lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(
+                    target=self.warm_up, args=(names,), name="model-warm-up", daemon=True)
+                self._warm_up_thread.start()
+        return self._warm_up_thread
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Shared registry for the whole process (survives Streamlit reruns)."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
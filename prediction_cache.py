@@ -0,0 +1,131 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+MAX_ENTRIES = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+TTL_SECONDS = float(os.environ.get("PREDICTION_CACHE_TTL", "3600"))
+
+
+def row_key(row):
+    """Hash of one encoded float64 feature row."""
+    return hashlib.blake2b(np.ascontiguousarray(row, dtype=np.float64).tobytes(), digest_size=16).digest()
+
+
+class PredictionCache:
+    """Bounded LRU/TTL cache of model outputs keyed by the encoded input row.
+
+    Entries belong to one model version (its registry key); when the model
+    changes the cache is cleared on the next lookup.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # row key -> (expires at, output row)
+        self._model_key = None
+        self._lock = threading.Lock()
+
+    def _bind(self, model_key):
+        if model_key != self._model_key:
+            self._entries.clear()
+            self._model_key = model_key
+
+    def predict(self, model_key, X, predict_fn):
+        """Rows of ``predict_fn(X)``, calling it only for rows not cached yet.
+
+        ``X`` is an (N, n_features) array from a FeatureEncoder; the misses
+        are scored together in a single ``predict_fn`` call.
+        """
+        keys = [row_key(row) for row in X]
+        now = time.monotonic()
+        results = [None] * len(keys)
+        missing = []
+        with self._lock:
+            self._bind(model_key)
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    results[i] = entry[1]
+                else:
+                    missing.append(i)
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            computed = predict_fn(X[missing])
+            with self._lock:
+                self._bind(model_key)
+                for i, output in zip(missing, computed):
+                    results[i] = output
+                    self._entries[keys[i]] = (now + self.ttl, output)
+                    self._entries.move_to_end(keys[i])
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return np.asarray(results)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / total if total else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_prediction_cache(name):
+    """Process-wide cache for one model name, shared by the UI and batch scoring."""
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = PredictionCache()
+        return _caches[name]
+
+
+def cache_stats(name):
+    """Hit/miss counters of the predict and predict_proba caches of ``name``."""
+    with _caches_lock:
+        caches = {'predict': _caches.get(name), 'predict_proba': _caches.get(f'{name}:proba')}
+    return {method: cache.stats() for method, cache in caches.items() if cache is not None}
+
+
+class CachedModel:
+    """Model wrapper whose ``predict``/``predict_proba`` go through the shared caches.
+
+    Every other attribute (``classes_``, ``feature_names_in_``...) is read
+    from the wrapped model.
+    """
+
+    def __init__(self, model, model_key, name):
+        self.model = model
+        self.model_key = model_key
+        self.name = name
+
+    def predict(self, X):
+        return get_prediction_cache(self.name).predict(self.model_key, X, self.model.predict)
+
+    def predict_proba(self, X):
+        return get_prediction_cache(f'{self.name}:proba').predict(self.model_key, X, self.model.predict_proba)
+
+    def __getattr__(self, attr):
+        # Only reached for missing attributes; ``model`` itself is missing while copy builds an instance
+        if attr == 'model':
+            raise AttributeError(attr)
+        return getattr(self.model, attr)
+
+
+def cached_model(registry, name):
+    """The model pinned under ``name`` in ``registry``, behind its prediction cache."""
+    model, model_key = registry.get_with_key(name)
+    return CachedModel(model, model_key, name)
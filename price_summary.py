@@ -0,0 +1,137 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_store import CLEANED_FLIGHT_STORE, ensure_store, read_frame
+
+N_BINS = 30
+# Percentile grid stored per slice; a price's percentile is interpolated on it
+PERCENTILES = np.linspace(0, 100, 101)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _route(source, destination):
+    # Works for scalars and for pandas Series alike
+    return source + ' → ' + destination
+
+
+class PriceSummary:
+    """Binned price distribution plus per-airline and per-route quantiles."""
+
+    def __init__(self, edges, counts, quantiles, airlines, airline_quantiles, routes, route_quantiles):
+        self.edges = edges
+        self.counts = counts
+        self.quantiles = quantiles
+        self.airline_quantiles = dict(zip(airlines.tolist(), airline_quantiles))
+        self.route_quantiles = dict(zip(routes.tolist(), route_quantiles))
+
+    @classmethod
+    def from_frame(cls, df):
+        prices = df['Price'].to_numpy(dtype=np.float64)
+        counts, edges = np.histogram(prices, bins=N_BINS)
+
+        def grouped(keys):
+            groups = pd.Series(prices).groupby(keys.to_numpy())
+            names = np.array(list(groups.groups), dtype=str)
+            table = np.vstack([np.percentile(groups.get_group(name).to_numpy(), PERCENTILES) for name in names])
+            return names, table
+
+        airlines, airline_quantiles = grouped(df['Airline'].astype(str))
+        routes, route_quantiles = grouped(_route(df['Source'].astype(str), df['Destination'].astype(str)))
+        return cls(edges, counts, np.percentile(prices, PERCENTILES),
+                   airlines, airline_quantiles, routes, route_quantiles)
+
+    def to_arrays(self):
+        return {
+            'edges': self.edges,
+            'counts': self.counts,
+            'quantiles': self.quantiles,
+            'airlines': np.array(list(self.airline_quantiles), dtype=str),
+            'airline_quantiles': np.vstack(list(self.airline_quantiles.values())),
+            'routes': np.array(list(self.route_quantiles), dtype=str),
+            'route_quantiles': np.vstack(list(self.route_quantiles.values())),
+        }
+
+    @staticmethod
+    def _percentile(price, quantiles):
+        return float(np.interp(price, quantiles, PERCENTILES))
+
+    def percentile(self, price):
+        """Share of all flights (in %) cheaper than ``price``."""
+        return self._percentile(price, self.quantiles)
+
+    def airline_percentile(self, price, airline):
+        quantiles = self.airline_quantiles.get(airline)
+        return None if quantiles is None else self._percentile(price, quantiles)
+
+    def route_percentile(self, price, source, destination):
+        quantiles = self.route_quantiles.get(_route(source, destination))
+        return None if quantiles is None else self._percentile(price, quantiles)
+
+
+def summary_path(source):
+    return os.path.splitext(source)[0] + '.price_summary.npz'
+
+
+def build_price_summary(source=CLEANED_FLIGHT_STORE, stamp=None):
+    """Rebuild the summary from the dataset and persist it next to the source."""
+    df = read_frame(source, columns=['Airline', 'Source', 'Destination', 'Price'])
+    summary = PriceSummary.from_frame(df)
+    stat = os.stat(source)
+    np.savez(summary_path(source), source_mtime=stat.st_mtime, source_size=stat.st_size,
+             source_sha256=stamp or _file_sha256(source), **summary.to_arrays())
+    return summary
+
+
+def load_price_summary(source=CLEANED_FLIGHT_STORE):
+    """Load the persisted summary, rebuilding it if the source dataset changed.
+
+    The mtime and size are checked first; the content hash is only computed
+    when they differ, so touching the file does not force a rebuild.
+    """
+    stat = os.stat(source)
+    try:
+        with np.load(summary_path(source)) as cached:
+            arrays = {name: cached[name] for name in cached.files}
+    except (OSError, ValueError):
+        return build_price_summary(source)
+
+    if arrays['source_mtime'] != stat.st_mtime or arrays['source_size'] != stat.st_size:
+        digest = _file_sha256(source)
+        if str(arrays['source_sha256']) != digest:
+            return build_price_summary(source, digest)
+        arrays.update(source_mtime=stat.st_mtime, source_size=stat.st_size)
+        np.savez(summary_path(source), **arrays)
+
+    return PriceSummary(arrays['edges'], arrays['counts'], arrays['quantiles'],
+                        arrays['airlines'], arrays['airline_quantiles'],
+                        arrays['routes'], arrays['route_quantiles'])
+
+
+_summaries = {}
+_summaries_lock = threading.Lock()
+
+
+def get_price_summary(source=CLEANED_FLIGHT_STORE):
+    """In-process cached summary; only a stat() of the source per call."""
+    if source == CLEANED_FLIGHT_STORE:
+        # Rebuilds the store when rows were appended to the raw CSV (two stat calls otherwise)
+        ensure_store()
+    mtime = os.stat(source).st_mtime
+    cached = _summaries.get(source)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with _summaries_lock:
+        summary = load_price_summary(source)
+        _summaries[source] = (mtime, summary)
+    return summary
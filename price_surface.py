@@ -0,0 +1,175 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from data_store import CLEANED_FLIGHT_STORE, ensure_store, read_frame
+from features import FLIGHT_ENCODER, flight_features
+from flight_cleaning import AIRLINE_VOCAB
+
+STOPS = np.arange(5)
+HOURS = np.arange(24)
+# Surfaces kept per process, one per (model version, travel date)
+MAX_SURFACES = 16
+
+
+def typical_durations(source=CLEANED_FLIGHT_STORE):
+    """Median duration in minutes of every (source, destination, stops) seen in the data."""
+    df = read_frame(source, columns=['Source', 'Destination', 'Total_Stops', 'Duration'])
+    medians = df.groupby(['Source', 'Destination', 'Total_Stops'], observed=True)['Duration'].median()
+    return {(str(s), str(d), int(n)): float(minutes) for (s, d, n), minutes in medians.items()}
+
+
+class PriceSurface:
+    """Predicted prices for one travel date over airline x route x stops x departure hour.
+
+    ``prices`` is a float32 array of shape (airlines, routes, stops, hours).
+    Route/stop combinations that never occur in the data are NaN. Every
+    query is an index into the array, not a model call.
+    """
+
+    def __init__(self, prices, airlines, routes, day, month):
+        self.prices = prices
+        self.airlines = list(airlines)
+        self.routes = [tuple(route) for route in routes]
+        self.day = day
+        self.month = month
+        self._airline_index = {airline: i for i, airline in enumerate(self.airlines)}
+        self._route_index = {route: i for i, route in enumerate(self.routes)}
+
+    @classmethod
+    def build(cls, model, day, month, durations=None):
+        """Price every grid point in one ``model.predict`` call.
+
+        Each (route, stops) gets its median duration in the data; the flight
+        departs on the hour and arrives that duration later.
+        """
+        durations = typical_durations() if durations is None else durations
+        routes = sorted({(source, destination) for source, destination, _ in durations})
+        airlines = np.asarray(AIRLINE_VOCAB)
+        shape = (len(airlines), len(routes), len(STOPS), len(HOURS))
+
+        duration = np.full(shape[1:3], np.nan)
+        for (source, destination, stops), minutes in durations.items():
+            if stops < len(STOPS):
+                duration[routes.index((source, destination)), stops] = minutes
+        a, r, s, h = (axis.ravel() for axis in np.indices(shape))
+        minutes = duration[r, s]
+        valid = ~np.isnan(minutes)
+        a, r, s, h, minutes = a[valid], r[valid], s[valid], h[valid], minutes[valid]
+        arrival = (h * 60 + minutes) % (24 * 60)
+        route_array = np.asarray(routes)
+
+        X = flight_features({
+            'Airline': airlines[a],
+            'Source': route_array[r, 0],
+            'Destination': route_array[r, 1],
+            'Duration': minutes,
+            'Total_Stops': s,
+            'Day_of_Journey': np.full(len(a), day),
+            'Month_of_Journey': np.full(len(a), month),
+            'Dep_Hour': h,
+            'Dep_Minute': np.zeros(len(a)),
+            'Arrival_Hour': arrival // 60,
+            'Arrival_Minute': arrival % 60,
+        })
+        prices = np.full(shape, np.nan, dtype=np.float32)
+        prices[a, r, s, h] = model.predict(X)
+        return cls(prices, airlines.tolist(), routes, day, month)
+
+    @property
+    def nbytes(self):
+        return self.prices.nbytes
+
+    def _route(self, source, destination):
+        return self._route_index.get((source, destination))
+
+    def has_route(self, source, destination):
+        return self._route(source, destination) is not None
+
+    def hour_prices(self, airline, source, destination, stops):
+        """Price by departure hour (24 values, NaN when the slice does not exist)."""
+        r = self._route(source, destination)
+        if r is None or airline not in self._airline_index or stops >= len(STOPS):
+            return np.full(len(HOURS), np.nan, dtype=np.float32)
+        return self.prices[self._airline_index[airline], r, stops]
+
+    def heatmap(self, source, destination, stops):
+        """(airlines, hours) prices of one route and number of stops."""
+        r = self._route(source, destination)
+        if r is None or stops >= len(STOPS):
+            return np.full((len(self.airlines), len(HOURS)), np.nan, dtype=np.float32)
+        return self.prices[:, r, stops]
+
+    def cheapest(self, source, destination, stops, airline=None):
+        """(airline, departure hour, price) of the cheapest flight, or None if there is none."""
+        if airline is None:
+            table, airlines = self.heatmap(source, destination, stops), self.airlines
+        else:
+            table, airlines = self.hour_prices(airline, source, destination, stops)[None], [airline]
+        if np.isnan(table).all():
+            return None
+        i, hour = np.unravel_index(np.nanargmin(table), table.shape)
+        return airlines[i], int(HOURS[hour]), float(table[i, hour])
+
+
+_surfaces = OrderedDict()
+_surfaces_lock = threading.Lock()
+
+
+def get_price_surface(registry, name, day, month):
+    """Price surface of the model pinned under ``name`` for one date.
+
+    Built once per model version and version of the flight data (the
+    durations come from it), so rows appended to the raw CSV are picked up.
+    """
+    ensure_store()
+    model, model_key = registry.get_with_key(name)
+    key = (model_key, os.stat(CLEANED_FLIGHT_STORE).st_mtime, day, month)
+    with _surfaces_lock:
+        surface = _surfaces.get(key)
+        if surface is not None:
+            _surfaces.move_to_end(key)
+            return surface
+    # The raw model: the grid would only churn the prediction cache
+    surface = PriceSurface.build(FLIGHT_ENCODER.predictor(model), day, month)
+    with _surfaces_lock:
+        _surfaces[key] = surface
+        while len(_surfaces) > MAX_SURFACES:
+            _surfaces.popitem(last=False)
+    return surface
+
+
+def price_explorer_section(surface, source, destination, stops, airline):
+    """Streamlit heatmap of one route's prices by airline and departure hour, with the cheapest times.
+
+    Returns the function that fills in the heatmap once rendered (see
+    ``chart_rendering.deferred_chart``).
+    """
+    import streamlit as st
+
+    from chart_rendering import data_key, deferred_chart, price_heatmap, render_chart
+
+    routes = [f'{s} → {d}' for s, d in surface.routes]
+    selected = f'{source} → {destination}'
+    route = st.selectbox("Route", routes, index=routes.index(selected) if selected in routes else 0,
+                         key="explorer_route")
+    source, destination = surface.routes[routes.index(route)]
+    stops = st.selectbox("Stops", list(STOPS), index=int(stops), key="explorer_stops")
+
+    cheapest = surface.cheapest(source, destination, stops)
+    if cheapest is None:
+        st.info(f"No {stops}-stop flights on {route} in the data.")
+        return lambda: None
+    best_airline, best_hour, best_price = cheapest
+    st.markdown(f"Cheapest departure on {surface.day:02d}/{surface.month:02d}: "
+                f"**{best_hour:02d}:00** with **{best_airline}**, about **₹ {best_price:,.0f}**.")
+    own = surface.cheapest(source, destination, stops, airline)
+    if own is not None and airline != best_airline:
+        st.markdown(f"With {airline}: **{own[1]:02d}:00**, about **₹ {own[2]:,.0f}**.")
+
+    table = surface.heatmap(source, destination, stops)
+    chart = render_chart('price heatmap', data_key(table, surface.airlines), price_heatmap,
+                         table, surface.airlines, HOURS)
+    return deferred_chart(chart)
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from werkzeug.exceptions import BadRequest, HTTPException, MethodNotAllowed, NotFound
+from werkzeug.routing import Map, Rule
+from werkzeug.wrappers import Request, Response
+
+from features import CUSTOMER_ENCODER, FLIGHT_ENCODER
+from model_registry import CUSTOMER_MODEL, FLIGHT_MODEL, get_registry
+from prediction_cache import cached_model
+from shadow_scoring import get_shadow_scorer
+
+BATCH_WINDOW_MS = float(os.environ.get("SERVE_BATCH_WINDOW_MS", "2"))
+MAX_BATCH_SIZE = int(os.environ.get("SERVE_MAX_BATCH_SIZE", "512"))
+
+
+class MicroBatcher:
+    """Collects rows from concurrent requests into one ``predict_fn`` call.
+
+    The first request that arrives opens a window of ``window_ms``; every
+    request queued before the window closes (or until ``max_batch`` rows) is
+    stacked into a single array and scored together.
+    """
+
+    def __init__(self, predict_fn, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH_SIZE):
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_worker(self):
+        # Started lazily so that forked server workers each get their own thread
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                    threading.Thread(target=self._run, name="micro-batcher", daemon=True).start()
+                    self._pid = os.getpid()
+
+    def submit(self, rows):
+        """Score ``rows`` (an (N, n_features) array) and block until the result is ready."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((rows, future))
+        return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.window
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self.predict_fn(np.vstack([rows for rows, _ in batch]))
+            except Exception:
+                # Score each request on its own, so one bad request only fails itself
+                for rows, future in batch:
+                    try:
+                        future.set_result(self.predict_fn(rows))
+                    except Exception as exc:
+                        future.set_exception(exc)
+                continue
+            start = 0
+            for rows, future in batch:
+                future.set_result(results[start:start + len(rows)])
+                start += len(rows)
+
+
+def predict_flight_price(X):
+    start = time.perf_counter()
+    prices = FLIGHT_ENCODER.predictor(cached_model(get_registry(), FLIGHT_MODEL)).predict(X)
+    # Shadow models score the same batch on background threads
+    get_shadow_scorer(FLIGHT_MODEL).submit(X, prices, time.perf_counter() - start)
+    return prices
+
+
+def predict_satisfaction(X):
+    model = CUSTOMER_ENCODER.predictor(cached_model(get_registry(), CUSTOMER_MODEL), require_schema=True)
+    proba = model.predict_proba(X)
+    return proba[:, list(model.classes_).index(1)]
+
+
+class PredictionService:
+    """WSGI application serving both models.
+
+    Request bodies are a JSON object of raw input fields (as entered on the
+    Streamlit pages) or a list of such objects.
+    """
+
+    def __init__(self, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH_SIZE, warm_up=True):
+        self.url_map = Map([
+            Rule('/health', endpoint='health', methods=['GET']),
+            Rule('/predict/flight-price', endpoint='flight_price', methods=['POST']),
+            Rule('/predict/satisfaction', endpoint='satisfaction', methods=['POST']),
+        ])
+        self.flight_batcher = MicroBatcher(predict_flight_price, window_ms, max_batch)
+        self.satisfaction_batcher = MicroBatcher(predict_satisfaction, window_ms, max_batch)
+        if warm_up:
+            registry = get_registry()
+            registry.warm_up()
+            FLIGHT_ENCODER.check_model(registry.get(FLIGHT_MODEL))
+            CUSTOMER_ENCODER.check_model(registry.get(CUSTOMER_MODEL), require_schema=True)
+
+    @staticmethod
+    def _encode(request, encoder):
+        try:
+            payload = json.loads(request.get_data())
+            if isinstance(payload, dict):
+                X = encoder.encode_row(payload)
+            elif isinstance(payload, list) and payload:
+                fields = encoder.numeric.keys() | encoder.categories.keys()
+                X = encoder.encode({field: [item[field] for item in payload] for field in fields})
+            else:
+                raise BadRequest("Expected a JSON object or a non-empty list of objects.")
+        except (ValueError, KeyError, TypeError) as exc:
+            raise BadRequest(f"Invalid input: {exc}")
+        # null (or NaN/Infinity) numeric fields encode to non-finite values the models reject
+        if not np.isfinite(X).all():
+            raise BadRequest("Invalid input: numeric fields must be finite numbers.")
+        return X
+
+    def on_health(self, request):
+        return {'status': 'ok', 'models': [uri for (uri, _), _ in get_registry().loaded()]}
+
+    def on_flight_price(self, request):
+        prices = self.flight_batcher.submit(self._encode(request, FLIGHT_ENCODER))
+        return {'predictions': [{'price': float(price)} for price in prices]}
+
+    def on_satisfaction(self, request):
+        probabilities = self.satisfaction_batcher.submit(self._encode(request, CUSTOMER_ENCODER))
+        return {'predictions': [{'satisfied': bool(p >= 0.5), 'probability': float(p)}
+                                for p in probabilities]}
+
+    def dispatch(self, request):
+        adapter = self.url_map.bind_to_environ(request.environ)
+        try:
+            endpoint, _ = adapter.match()
+            body = getattr(self, f'on_{endpoint}')(request)
+        except (NotFound, MethodNotAllowed, BadRequest) as exc:
+            body, status = {'error': exc.description}, exc.code
+        except HTTPException as exc:
+            return exc
+        except Exception as exc:
+            body, status = {'error': f"Prediction failed: {exc}"}, 500
+        else:
+            status = 200
+        return Response(json.dumps(body), status=status, mimetype='application/json')
+
+    def __call__(self, environ, start_response):
+        return self.dispatch(Request(environ))(environ, start_response)
+
+
+def create_app():
+    """Entry point for WSGI servers, e.g. ``gunicorn -w 4 --threads 8 'serve:create_app()'``."""
+    return PredictionService()
+
+
+def main(argv=None):
+    from werkzeug.serving import run_simple
+
+    parser = argparse.ArgumentParser(description="HTTP prediction server for the flight price and customer satisfaction models.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--batch-window-ms", type=float, default=BATCH_WINDOW_MS,
+                        help="How long to wait for concurrent requests to join a batch.")
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    app = PredictionService(args.batch_window_ms, args.max_batch_size)
+    run_simple(args.host, args.port, app, threaded=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from features import CUSTOMER_ENCODER, FLIGHT_ENCODER
+from model_registry import CUSTOMER_MODEL, FLIGHT_MODEL, get_registry
+from prediction_cache import row_key
+
+SHADOW_LOG = os.environ.get("SHADOW_LOG", "shadow_log.jsonl")
+SHADOW_WORKERS = int(os.environ.get("SHADOW_WORKERS", "2"))
+# Shadow requests waiting for a worker; beyond this new ones are dropped
+MAX_PENDING = int(os.environ.get("SHADOW_MAX_PENDING", "256"))
+ENCODERS = {FLIGHT_MODEL: FLIGHT_ENCODER, CUSTOMER_MODEL: CUSTOMER_ENCODER}
+
+
+class ShadowScorer:
+    """Scores every prediction of one model name again with its shadow models.
+
+    ``submit`` only copies the inputs and queues the work, so the user-facing
+    request never waits for a shadow. Each shadow result is appended as one
+    JSON line with the primary's output and latency for later comparison.
+    """
+
+    def __init__(self, name, registry=None, log_path=SHADOW_LOG, max_workers=SHADOW_WORKERS,
+                 max_pending=MAX_PENDING):
+        self.name = name
+        self.registry = registry or get_registry()
+        self.log_path = log_path
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.submitted = 0
+        self.dropped = 0
+        self.errors = 0
+        self._pending = 0
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+
+    def _ensure_executor(self):
+        # Created lazily so that forked server workers each get their own pool
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="shadow")
+                    self._pending = 0
+                    self._pid = os.getpid()
+
+    def submit(self, X, predictions, latency):
+        """Queue the shadow models on the rows ``X`` the primary scored in ``latency`` seconds."""
+        uris = self.registry.shadow_uris(self.name)
+        if not uris:
+            return
+        self._ensure_executor()
+        # Callers reuse their buffers, so the workers get their own copies;
+        # everything else (hashing, serializing) happens on the workers
+        primary = (time.time(), self.registry.pinned_uri(self.name),
+                   np.array(predictions, dtype=np.float64), latency)
+        X = np.array(X, dtype=np.float64)
+        for uri in uris:
+            with self._lock:
+                if self._pending >= self.max_pending:
+                    self.dropped += 1
+                    continue
+                self._pending += 1
+                self.submitted += 1
+            self._executor.submit(self._score, uri, X, primary)
+
+    def _score(self, uri, X, primary):
+        submitted_at, primary_uri, primary_predictions, primary_latency = primary
+        record = {
+            'time': submitted_at,
+            'model': self.name,
+            'rows': [row_key(row).hex() for row in X],
+            'primary': {'uri': primary_uri, 'predictions': primary_predictions.tolist(),
+                        'latency_ms': primary_latency * 1000},
+            'shadow': {'uri': uri},
+        }
+        try:
+            model = ENCODERS[self.name].predictor(self.registry.load(uri))
+            start = time.perf_counter()
+            predictions = model.predict(X)
+            record['shadow']['latency_ms'] = (time.perf_counter() - start) * 1000
+            record['shadow']['predictions'] = np.asarray(predictions, dtype=np.float64).tolist()
+        except Exception as exc:
+            record['shadow']['error'] = repr(exc)
+            with self._lock:
+                self.errors += 1
+        finally:
+            with self._lock:
+                self._pending -= 1
+        self._append(record)
+
+    def _append(self, record):
+        line = json.dumps(record) + '\n'
+        with self._log_lock, open(self.log_path, 'a') as fh:
+            fh.write(line)
+
+    def stats(self):
+        with self._lock:
+            return {'shadows': self.registry.shadow_uris(self.name), 'submitted': self.submitted,
+                    'pending': self._pending, 'dropped': self.dropped, 'errors': self.errors}
+
+
+_scorers = {}
+_scorers_lock = threading.Lock()
+
+
+def get_shadow_scorer(name=FLIGHT_MODEL):
+    """Process-wide shadow scorer for one model name."""
+    with _scorers_lock:
+        if name not in _scorers:
+            _scorers[name] = ShadowScorer(name)
+        return _scorers[name]
+
+
+def read_log(path=SHADOW_LOG):
+    with open(path) as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def compare(records):
+    """Per (model, shadow URI): error and latency of the shadow against the served model."""
+    groups = {}
+    for record in records:
+        group = groups.setdefault((record['model'], record['shadow']['uri']), {
+            'requests': 0, 'errors': 0, 'diff': [], 'primary_ms': [], 'shadow_ms': []})
+        group['requests'] += 1
+        if 'error' in record['shadow']:
+            group['errors'] += 1
+            continue
+        group['diff'].extend(np.subtract(record['shadow']['predictions'], record['primary']['predictions']))
+        group['primary_ms'].append(record['primary']['latency_ms'])
+        group['shadow_ms'].append(record['shadow']['latency_ms'])
+
+    report = {}
+    for (model, uri), group in groups.items():
+        diff = np.asarray(group['diff'])
+        entry = {'requests': group['requests'], 'rows': len(diff), 'errors': group['errors']}
+        if len(diff):
+            entry.update({
+                'mean_diff': float(diff.mean()),
+                'mean_abs_diff': float(np.abs(diff).mean()),
+                'primary_p50_ms': float(np.percentile(group['primary_ms'], 50)),
+                'primary_p95_ms': float(np.percentile(group['primary_ms'], 95)),
+                'shadow_p50_ms': float(np.percentile(group['shadow_ms'], 50)),
+                'shadow_p95_ms': float(np.percentile(group['shadow_ms'], 95)),
+            })
+        report.setdefault(model, {})[uri] = entry
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare shadow models against the served model from the shadow log.")
+    parser.add_argument("--log", default=SHADOW_LOG)
+    parser.add_argument("--json", action="store_true", help="Print the comparison as JSON.")
+    args = parser.parse_args(argv)
+
+    report = compare(read_log(args.log))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    for model, shadows in report.items():
+        print(model)
+        for uri, entry in shadows.items():
+            print(f"  {uri}: {entry['requests']} requests, {entry['rows']} rows, {entry['errors']} errors")
+            if entry['rows']:
+                print(f"    mean diff {entry['mean_diff']:+.2f}, mean |diff| {entry['mean_abs_diff']:.2f}")
+                print(f"    latency p50/p95: primary {entry['primary_p50_ms']:.2f}/{entry['primary_p95_ms']:.2f} ms, "
+                      f"shadow {entry['shadow_p50_ms']:.2f}/{entry['shadow_p95_ms']:.2f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+import serve
+from features import CUSTOMER_ENCODER, FLIGHT_ENCODER, FLIGHT_FEATURE_COLUMNS
+from model_registry import CUSTOMER_MODEL, FLIGHT_MODEL
+from prediction_cache import CachedModel
+
+
+class StubRegistry:
+    def __init__(self, models):
+        self.models = models
+
+    def get_with_key(self, name):
+        return self.models[name], (name, 'test')
+
+
+class StubShadowScorer:
+    def submit(self, X, predictions, latency):
+        pass
+
+
+@pytest.fixture(scope='module')
+def models():
+    # Fitted on DataFrames, like the models train.py logs
+    rng = np.random.default_rng(0)
+    X_flight = rng.uniform(0, 10, (300, FLIGHT_ENCODER.n_features))
+    X_customer = rng.uniform(0, 5, (300, CUSTOMER_ENCODER.n_features))
+    flight = GradientBoostingRegressor(n_estimators=20, random_state=0)
+    flight.fit(pd.DataFrame(X_flight, columns=FLIGHT_ENCODER.columns), X_flight[:, 0])
+    customer = make_pipeline(StandardScaler(), RandomForestClassifier(n_estimators=10, random_state=0))
+    customer.fit(pd.DataFrame(X_customer, columns=CUSTOMER_ENCODER.columns), (X_customer[:, 2] > 2.5).astype(int))
+    return {FLIGHT_MODEL: (flight, X_flight[:20]), CUSTOMER_MODEL: (customer, X_customer[:20])}
+
+
+def test_predictor_predicts_without_warning(models):
+    flight, X_flight = models[FLIGHT_MODEL]
+    customer, X_customer = models[CUSTOMER_MODEL]
+    expected_prices = flight.predict(pd.DataFrame(X_flight, columns=FLIGHT_ENCODER.columns))
+    expected_proba = customer.predict_proba(pd.DataFrame(X_customer, columns=CUSTOMER_ENCODER.columns))
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        np.testing.assert_array_equal(FLIGHT_ENCODER.predictor(flight).predict(X_flight), expected_prices)
+        cached = CachedModel(customer, ('customer', 'test'), 'test_customer')
+        predictor = CUSTOMER_ENCODER.predictor(cached, require_schema=True)
+        np.testing.assert_array_equal(predictor.predict_proba(X_customer), expected_proba)
+    # The registry's copy keeps its schema for the next check
+    assert list(flight.feature_names_in_) == FLIGHT_ENCODER.columns
+    assert list(customer.feature_names_in_) == CUSTOMER_ENCODER.columns
+
+
+def test_predictor_rejects_other_layout(models):
+    flight, _ = models[FLIGHT_MODEL]
+    with pytest.raises(ValueError):
+        CUSTOMER_ENCODER.predictor(flight)
+    reordered = GradientBoostingRegressor(n_estimators=2).fit(
+        pd.DataFrame(np.zeros((4, len(FLIGHT_FEATURE_COLUMNS))), columns=FLIGHT_FEATURE_COLUMNS[::-1]), range(4))
+    with pytest.raises(ValueError):
+        FLIGHT_ENCODER.predictor(reordered)
+
+
+def test_served_predict_emits_no_warning(models, monkeypatch):
+    monkeypatch.setattr(serve, 'get_registry', lambda: StubRegistry({name: model for name, (model, _) in models.items()}))
+    monkeypatch.setattr(serve, 'get_shadow_scorer', lambda name: StubShadowScorer())
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert serve.predict_flight_price(models[FLIGHT_MODEL][1]).shape == (20,)
+        assert serve.predict_satisfaction(models[CUSTOMER_MODEL][1]).shape == (20,)
@@ -0,0 +1,115 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+from werkzeug.test import Client
+
+import serve
+from features import CUSTOMER_ENCODER, FLIGHT_ENCODER
+from model_registry import CUSTOMER_MODEL, FLIGHT_MODEL
+
+FLIGHT_ROW = {
+    'Airline': 'IndiGo', 'Source': 'Delhi', 'Destination': 'Cochin', 'Duration': 170, 'Total_Stops': 1,
+    'Day_of_Journey': 24, 'Month_of_Journey': 3, 'Dep_Hour': 22, 'Dep_Minute': 20,
+    'Arrival_Hour': 1, 'Arrival_Minute': 10,
+}
+DURATION = FLIGHT_ENCODER.columns.index('Duration')
+
+
+class StubModel:
+    """Prices are the duration; negative durations fail the whole predict call."""
+
+    def __init__(self, columns):
+        self.feature_names_in_ = np.asarray(columns, dtype=object)
+        self.classes_ = np.array([0, 1])
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        if (X[:, DURATION] < 0).any():
+            raise ValueError("negative duration")
+        return X[:, DURATION].copy()
+
+    def predict_proba(self, X):
+        self.calls.append(len(X))
+        return np.full((len(X), 2), 0.5)
+
+
+class StubRegistry:
+    def __init__(self):
+        self.models = {FLIGHT_MODEL: StubModel(FLIGHT_ENCODER.columns),
+                       CUSTOMER_MODEL: StubModel(CUSTOMER_ENCODER.columns)}
+
+    def get_with_key(self, name):
+        # A key per stub, so the shared prediction cache never answers for it
+        return self.models[name], (name, id(self))
+
+    def loaded(self):
+        return []
+
+
+class StubShadowScorer:
+    def submit(self, X, predictions, latency):
+        pass
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = StubRegistry()
+    monkeypatch.setattr(serve, 'get_registry', lambda: registry)
+    monkeypatch.setattr(serve, 'get_shadow_scorer', lambda name: StubShadowScorer())
+    return registry
+
+
+def post(client, body):
+    return client.post('/predict/flight-price', data=body if isinstance(body, str) else json.dumps(body))
+
+
+def post_concurrently(client, bodies):
+    responses = [None] * len(bodies)
+
+    def send(i):
+        responses[i] = post(client, bodies[i])
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(len(bodies))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+
+def test_predicts_one_row(registry):
+    response = post(Client(serve.PredictionService(warm_up=False)), FLIGHT_ROW)
+    assert response.status_code == 200
+    assert response.json == {'predictions': [{'price': 170.0}]}
+
+
+@pytest.mark.parametrize('body', [
+    {**FLIGHT_ROW, 'Duration': None},
+    json.dumps([FLIGHT_ROW, {**FLIGHT_ROW, 'Duration': float('nan')}]),
+    json.dumps({**FLIGHT_ROW, 'Dep_Hour': float('inf')}),
+], ids=['null', 'nan', 'infinity'])
+def test_rejects_non_finite_input(registry, body):
+    response = post(Client(serve.PredictionService(warm_up=False)), body)
+    assert response.status_code == 400
+    assert 'finite' in response.json['error']
+    assert registry.models[FLIGHT_MODEL].calls == []
+
+
+def test_bad_request_does_not_fail_its_batch(registry):
+    client = Client(serve.PredictionService(window_ms=500, warm_up=False))
+    bodies = [{**FLIGHT_ROW, 'Duration': 100 + i} for i in range(4)] + [{**FLIGHT_ROW, 'Duration': -1}]
+    responses = post_concurrently(client, bodies)
+    assert [response.status_code for response in responses] == [200] * 4 + [500]
+    assert [response.json['predictions'][0]['price'] for response in responses[:4]] == [100, 101, 102, 103]
+    # One failed call for the whole batch, then one per request
+    assert registry.models[FLIGHT_MODEL].calls == [5] + [1] * 5
+
+
+def test_concurrent_requests_share_one_predict_call(registry):
+    client = Client(serve.PredictionService(window_ms=500, warm_up=False))
+    responses = post_concurrently(client, [{**FLIGHT_ROW, 'Duration': 100 + i} for i in range(8)])
+    assert sorted(response.json['predictions'][0]['price'] for response in responses) == list(range(100, 108))
+    assert registry.models[FLIGHT_MODEL].calls == [8]
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+from bench_trees import fixture_models
+from tree_compile import CompiledForest, check_parity, compile_ensemble
+
+# float32 node values round each tree's output; the sums drift a little
+TOLERANCES = {False: (1e-6, 1e-6), True: (1e-4, 1e-2)}
+
+
+@pytest.fixture(scope='module')
+def models():
+    fixtures = fixture_models(n_rows=2_000)
+    gb, X_flight = fixtures['flight_price']
+    rf_classifier, X_customer = fixtures['customer_satisfaction']
+    y_flight = gb.predict(X_flight)
+    rf_regressor = RandomForestRegressor(n_estimators=50, max_depth=12, random_state=0).fit(X_flight, y_flight)
+    return {
+        'gradient boosting': (gb, X_flight),
+        'random forest classifier': (rf_classifier, X_customer),
+        'random forest regressor': (rf_regressor, X_flight),
+    }
+
+
+@pytest.mark.parametrize('float32', [False, True], ids=['float64', 'float32'])
+@pytest.mark.parametrize('name', ['gradient boosting', 'random forest classifier', 'random forest regressor'])
+def test_parity_with_sklearn(models, name, float32):
+    model, X = models[name]
+    compiled = compile_ensemble(model, float32=float32)
+    rtol, atol = TOLERANCES[float32]
+    check_parity(model, compiled, X, rtol=rtol, atol=atol)
+    # One row at a time takes the same path as the apps
+    check_parity(model, compiled, X[:1], rtol=rtol, atol=atol)
+    if compiled.classes_ is not None:
+        np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+
+
+@pytest.mark.parametrize('float32', [False, True], ids=['float64', 'float32'])
+@pytest.mark.parametrize('name', ['gradient boosting', 'random forest classifier', 'random forest regressor'])
+def test_contributions_sum_to_prediction(models, name, float32):
+    model, X = models[name]
+    compiled = compile_ensemble(model, float32=float32)
+    X = X[:200]
+    contributions = compiled.contributions(X)
+    assert contributions.shape == (len(X), X.shape[1], compiled.value.shape[1])
+    rtol, atol = TOLERANCES[float32]
+    np.testing.assert_allclose(compiled.bias + contributions.sum(axis=1), compiled.predict_raw(X),
+                               rtol=rtol, atol=atol)
+
+
+def test_save_and_load_round_trip(models, tmp_path):
+    model, X = models['gradient boosting']
+    compiled = compile_ensemble(model)
+    path = tmp_path / 'flight_price.npz'
+    compiled.save(path)
+    np.testing.assert_array_equal(CompiledForest.load(path).predict(X), compiled.predict(X))
+
+
+def test_rejects_models_without_trees(models):
+    _, X = models['gradient boosting']
+    with pytest.raises(TypeError):
+        compile_ensemble(LinearRegression().fit(X, X[:, 0]))
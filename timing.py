@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+RING_SIZE = 1000
+
+
+class StageTimings:
+    """Keeps the last ``maxlen`` durations of every named stage in a ring buffer."""
+
+    def __init__(self, maxlen=RING_SIZE):
+        self.maxlen = maxlen
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            if stage not in self._samples:
+                self._samples[stage] = deque(maxlen=self.maxlen)
+            self._samples[stage].append(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def percentiles(self, stage):
+        """p50/p95/p99 of a stage in milliseconds."""
+        with self._lock:
+            samples = np.array(self._samples.get(stage, ()))
+        if not len(samples):
+            return {'count': 0, 'p50': None, 'p95': None, 'p99': None}
+        p50, p95, p99 = np.percentile(samples * 1000, [50, 95, 99])
+        return {'count': len(samples), 'p50': p50, 'p95': p95, 'p99': p99}
+
+    def summary(self):
+        with self._lock:
+            stages = list(self._samples)
+        return {stage: self.percentiles(stage) for stage in stages}
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+
+_timings = {}
+_timings_lock = threading.Lock()
+
+
+def get_timings(name):
+    """Process-wide timings for one app, shared by all sessions."""
+    with _timings_lock:
+        if name not in _timings:
+            _timings[name] = StageTimings()
+        return _timings[name]
+
+
+def render_diagnostics(timings, key, counters=None):
+    """Optional Streamlit panel with per-stage latency percentiles (and any extra counters)."""
+    import pandas as pd
+    import streamlit as st
+
+    if not st.sidebar.checkbox("Show diagnostics", key=f"diagnostics_{key}"):
+        return
+    summary = timings.summary()
+    with st.expander("Diagnostics: stage latency (ms)", expanded=True):
+        if counters:
+            st.write(counters)
+        if not summary:
+            st.write("No timings recorded yet.")
+            return
+        table = pd.DataFrame.from_dict(summary, orient='index')[['count', 'p50', 'p95', 'p99']]
+        st.dataframe(table.style.format({'p50': '{:.3f}', 'p95': '{:.3f}', 'p99': '{:.3f}'}))
@@ -0,0 +1,227 @@
+import argparse
+import hashlib
+import json
+import math
+import sys
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestClassifier, RandomForestRegressor
+from sklearn.metrics import accuracy_score, f1_score, mean_squared_error, r2_score
+from sklearn.model_selection import ParameterSampler, cross_val_score, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from data_store import ENCODED_FLIGHT_STORE, read_frame
+from features import CUSTOMER_FEATURE_COLUMNS, FLIGHT_FEATURE_COLUMNS
+
+FLIGHT_DATA = ENCODED_FLIGHT_STORE
+CUSTOMER_DATA = 'data/cleaned_customer.csv'
+
+# Search spaces are the grids from the modelling notebooks
+PARAM_SPACE_RF = {
+    'n_estimators': [100, 200, 300],
+    'max_depth': [10, 20, 30],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4]
+}
+PARAM_SPACE_GB = {
+    'n_estimators': [100, 200, 300],
+    'learning_rate': [0.01, 0.1, 0.05],
+    'max_depth': [3, 5, 10],
+    'subsample': [0.8, 1.0]
+}
+
+# Every search trains on an explicit column list (the layout the apps encode to),
+# which becomes the logged signature and the model's feature_names_in_
+SEARCHES = {
+    'flight-rf': {
+        'experiment': 'Flight Price Prediction',
+        'run_name': 'Random Forest Regressor Tuning',
+        'data': FLIGHT_DATA,
+        'target': 'Price',
+        'columns': FLIGHT_FEATURE_COLUMNS,
+        'estimator': RandomForestRegressor(random_state=42),
+        'space': PARAM_SPACE_RF,
+        'scoring': 'neg_root_mean_squared_error',
+    },
+    'flight-gb': {
+        'experiment': 'Flight Price Prediction',
+        'run_name': 'Gradient Boosting Regressor Tuning',
+        'data': FLIGHT_DATA,
+        'target': 'Price',
+        'columns': FLIGHT_FEATURE_COLUMNS,
+        'estimator': GradientBoostingRegressor(random_state=42),
+        'space': PARAM_SPACE_GB,
+        'scoring': 'neg_root_mean_squared_error',
+    },
+    'customer-rf': {
+        'experiment': 'Customer_Satisfaction_Models',
+        'run_name': 'random_forest_model',
+        'data': CUSTOMER_DATA,
+        'target': 'satisfaction',
+        'columns': CUSTOMER_FEATURE_COLUMNS,
+        # Scaling is part of the logged model, so serving cannot skip or repeat it
+        'estimator': Pipeline([('scaler', StandardScaler()), ('model', RandomForestClassifier(random_state=42))]),
+        'space': {f'model__{param}': values for param, values in PARAM_SPACE_RF.items()},
+        'scoring': 'accuracy',
+    },
+}
+
+
+def load_dataset(path, target, columns=None):
+    # The Parquet store keeps compact int dtypes; the tree models convert them to float32 internally
+    data = read_frame(path)
+    missing = data.columns[data.isnull().any()]
+    if len(missing):
+        data = data.astype({col: 'float64' for col in missing})
+        data = data.fillna(data.mean(numeric_only=True))
+    # Selecting the columns fails loudly if the file lacks one and fixes their order
+    X = data[columns] if columns is not None else data.drop(target, axis=1)
+    y = data[target]
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+
+def _key(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _evaluate(trial_key, params, estimator, X, y, cv, scoring):
+    model = clone(estimator).set_params(**params)
+    return trial_key, params, float(np.mean(cross_val_score(model, X, y, cv=cv, scoring=scoring)))
+
+
+class TrialStore:
+    """Finished trials of one search, kept as nested MLflow runs.
+
+    An interrupted search started again with the same settings finds its
+    parent run by ``search_key`` and skips every trial already logged.
+    """
+
+    def __init__(self, experiment, run_name, search_key):
+        import mlflow
+
+        self.mlflow = mlflow
+        mlflow.set_experiment(experiment)
+        self.experiment_id = mlflow.get_experiment_by_name(experiment).experiment_id
+        self.search_key = search_key
+
+        parents = mlflow.search_runs([self.experiment_id], output_format='list',
+                                     filter_string=f"tags.search_key = '{search_key}' and tags.search_role = 'parent'")
+        if parents:
+            self.parent = mlflow.start_run(run_id=parents[0].info.run_id)
+        else:
+            self.parent = mlflow.start_run(run_name=run_name,
+                                           tags={'search_key': search_key, 'search_role': 'parent'})
+
+    def finished(self):
+        runs = self.mlflow.search_runs([self.experiment_id], output_format='list',
+                                       filter_string=f"tags.search_key = '{self.search_key}' and tags.search_role = 'trial'")
+        return {run.data.tags['trial_key']: run.data.metrics['cv_score']
+                for run in runs if 'cv_score' in run.data.metrics}
+
+    def log(self, trial_key, params, n_samples, score):
+        with self.mlflow.start_run(nested=True, run_name=f"trial {trial_key}",
+                                   tags={'search_key': self.search_key, 'search_role': 'trial',
+                                         'trial_key': trial_key}):
+            self.mlflow.log_params(params)
+            self.mlflow.log_param('n_samples', n_samples)
+            self.mlflow.log_metric('cv_score', score)
+
+    def close(self):
+        self.mlflow.end_run()
+
+
+def successive_halving(name, X, y, store, n_candidates=30, factor=3, min_samples=1000,
+                       cv=5, n_jobs=-1, random_state=42):
+    """Randomized successive-halving search over ``SEARCHES[name]['space']``.
+
+    Candidates are scored on growing row subsets; only the best 1/``factor``
+    move on to the next rung. With ``factor=1`` every candidate is scored on
+    the full training set (plain randomized search). Returns the best params.
+    """
+    config = SEARCHES[name]
+    candidates = list(ParameterSampler(config['space'], n_candidates, random_state=random_state))
+    order = np.random.RandomState(random_state).permutation(len(X))
+
+    n_rungs = 1 if factor <= 1 else max(1, int(math.log(len(candidates), factor)) + 1)
+    finished = store.finished()
+    best_params = None
+
+    for rung in range(n_rungs):
+        n_samples = len(X) if rung == n_rungs - 1 else min(len(X), max(min_samples, len(X) // factor ** (n_rungs - 1 - rung)))
+        rows = order[:n_samples]
+        X_rung, y_rung = X.iloc[rows], y.iloc[rows]
+        trial_keys = [_key(params, n_samples) for params in candidates]
+        pending = [(key, params) for key, params in zip(trial_keys, candidates) if key not in finished]
+
+        results = Parallel(n_jobs=n_jobs, return_as='generator_unordered')(
+            delayed(_evaluate)(key, params, config['estimator'], X_rung, y_rung, cv, config['scoring'])
+            for key, params in pending
+        )
+        # Each trial is recorded as soon as it finishes so an interruption loses little work
+        for key, params, score in results:
+            store.log(key, params, n_samples, score)
+            finished[key] = score
+            print(f"[{name}] rung {rung} n={n_samples} score={score:.4f} {params}")
+
+        ranked = sorted(zip(trial_keys, candidates), key=lambda item: finished[item[0]], reverse=True)
+        best_params = ranked[0][1]
+        candidates = [params for _, params in ranked[:max(1, math.ceil(len(ranked) / factor))]]
+
+    return best_params
+
+
+def run_search(name, n_candidates=30, factor=3, min_samples=1000, cv=5, n_jobs=-1, random_state=42):
+    """Search, then fit the best model once on the training set and log it."""
+    import mlflow.sklearn
+    from mlflow.models.signature import infer_signature
+
+    config = SEARCHES[name]
+    X_train, X_test, y_train, y_test = load_dataset(config['data'], config['target'], config['columns'])
+    search_key = _key(name, config['space'], n_candidates, factor, min_samples, cv, random_state, X_train.shape)
+
+    store = TrialStore(config['experiment'], config['run_name'], search_key)
+    try:
+        best_params = successive_halving(name, X_train, y_train, store, n_candidates, factor,
+                                         min_samples, cv, n_jobs, random_state)
+        # The search does not refit, so this is the only fit of the final model
+        model = clone(config['estimator']).set_params(**best_params)
+        model.fit(X_train, y_train)
+        y_pred = model.predict(X_test)
+
+        mlflow.log_params(best_params)
+        if config['scoring'] == 'accuracy':
+            metrics = {'accuracy': accuracy_score(y_test, y_pred), 'f1_score': f1_score(y_test, y_pred)}
+        else:
+            metrics = {'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))), 'r2': r2_score(y_test, y_pred)}
+        mlflow.log_metrics(metrics)
+        mlflow.sklearn.log_model(model, config['run_name'], signature=infer_signature(X_train.astype('float64'), y_pred))
+        print(f"{config['run_name']} - {metrics}")
+        return store.parent.info.run_id
+    finally:
+        store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hyperparameter search and training for the served models.")
+    parser.add_argument("searches", nargs='+', choices=sorted(SEARCHES) + ['all'])
+    parser.add_argument("--n-candidates", type=int, default=30, help="Parameter sets sampled from the space.")
+    parser.add_argument("--factor", type=int, default=3, help="Halving factor (1 = plain randomized search).")
+    parser.add_argument("--min-samples", type=int, default=1000, help="Rows used in the first rung.")
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes (-1 = all cores).")
+    parser.add_argument("--random-state", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    names = sorted(SEARCHES) if 'all' in args.searches else args.searches
+    for name in names:
+        run_id = run_search(name, args.n_candidates, args.factor, args.min_samples,
+                            args.cv, args.n_jobs, args.random_state)
+        print(f"{name}: logged run {run_id}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,240 @@
+import argparse
+import sys
+
+import numpy as np
+
+# Rows evaluated together; bounds the (rows x trees) node-index arrays
+ROW_BLOCK = 2048
+
+
+class CompiledForest:
+    """A fitted tree ensemble flattened into contiguous node arrays.
+
+    All trees share one set of arrays (``feature``, ``threshold``,
+    ``children`` as (left, right) pairs, ``value``); ``roots`` holds the index
+    of each tree's root. Leaves point to themselves, so a batch is evaluated
+    level by level for every (row, tree) pair at once, dropping pairs as they
+    reach a leaf: at most ``max_depth`` vectorized steps, no Python per tree.
+
+    The raw output is ``base + scale * combine(leaf values)``, where the
+    leaf values are summed (gradient boosting) or averaged (random forest).
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth,
+                 base, scale, n_features, classes=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.base = base
+        self.scale = float(scale)
+        self.n_features = int(n_features)
+        self.classes_ = classes
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.children, self.value, self.roots))
+
+    def leaves(self, X):
+        """Leaf index reached in every tree, shape (n_rows, n_trees)."""
+        # sklearn compares float32 inputs against the split thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_trees = X.shape[0], len(self.roots)
+        flat_x = X.ravel()
+        flat_children = self.children.ravel()
+
+        node = np.tile(self.roots, n_rows)
+        # Only (row, tree) pairs that have not reached a leaf are stepped
+        active = np.arange(node.size)
+        current = node.copy()
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.int64) * X.shape[1], n_trees)
+        for _ in range(self.max_depth):
+            go_right = flat_x[row_offset + self.feature[current]] > self.threshold[current]
+            following = flat_children[2 * current + go_right]
+            node[active] = following
+            moving = following != current
+            if not moving.all():
+                active, following, row_offset = active[moving], following[moving], row_offset[moving]
+                if not len(active):
+                    break
+            current = following
+        return node.reshape(n_rows, n_trees)
+
+    @property
+    def bias(self):
+        """Raw output before any split: the training-set expectation of the ensemble."""
+        return self.base + self.scale * self.value[self.roots].sum(axis=0, dtype=np.float64)
+
+    def contributions(self, X):
+        """Tree-interpreter decomposition of ``predict_raw``, shape (n_rows, n_features, n_outputs).
+
+        Every split on a row's path moves the node value by ``value[child] -
+        value[parent]``; that change is credited to the split feature, so
+        ``bias + contributions(X).sum(axis=1) == predict_raw(X)``.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_trees, n_outputs = X.shape[0], len(self.roots), self.value.shape[1]
+        flat_x = X.ravel()
+        flat_children = self.children.ravel()
+
+        current = np.tile(self.roots, n_rows)
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.int64) * self.n_features, n_trees)
+        totals = np.zeros((n_rows * self.n_features, n_outputs))
+        for _ in range(self.max_depth):
+            split = self.feature[current]
+            following = flat_children[2 * current + (flat_x[row_offset + split] > self.threshold[current])]
+            moving = following != current
+            if not moving.all():
+                current, following, row_offset, split = (current[moving], following[moving],
+                                                         row_offset[moving], split[moving])
+                if not len(current):
+                    break
+            delta = self.value[following].astype(np.float64) - self.value[current]
+            cells = row_offset + split
+            for k in range(n_outputs):
+                totals[:, k] += np.bincount(cells, weights=delta[:, k], minlength=len(totals))
+            current = following
+        return self.scale * totals.reshape(n_rows, self.n_features, n_outputs)
+
+    def predict_raw(self, X):
+        X = np.asarray(X)
+        out = np.empty((len(X), self.value.shape[1]))
+        for start in range(0, len(X), ROW_BLOCK):
+            leaves = self.leaves(X[start:start + ROW_BLOCK])
+            out[start:start + ROW_BLOCK] = self.value[leaves].sum(axis=1, dtype=np.float64)
+        return self.base + self.scale * out
+
+    def predict(self, X):
+        raw = self.predict_raw(X)
+        if self.classes_ is None:
+            return raw[:, 0]
+        return self.classes_[raw.argmax(axis=1)]
+
+    def predict_proba(self, X):
+        if self.classes_ is None:
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self.predict_raw(X)
+
+    def to_arrays(self):
+        arrays = {
+            'feature': self.feature, 'threshold': self.threshold, 'children': self.children,
+            'value': self.value, 'roots': self.roots, 'max_depth': np.array(self.max_depth),
+            'base': self.base, 'scale': np.array(self.scale), 'n_features': np.array(self.n_features),
+        }
+        if self.classes_ is not None:
+            arrays['classes'] = self.classes_
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['feature'], arrays['threshold'], arrays['children'],
+                   arrays['value'], arrays['roots'], arrays['max_depth'], arrays['base'],
+                   arrays['scale'], arrays['n_features'], arrays['classes'] if 'classes' in arrays else None)
+
+    def save(self, path):
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls.from_arrays({name: arrays[name] for name in arrays.files})
+
+
+def _flatten(trees, normalize, dtype):
+    feature, threshold, children, value, roots = [], [], [], [], []
+    offset, max_depth = 0, 0
+    for tree in trees:
+        t = tree.tree_
+        n = t.node_count
+        is_leaf = t.children_left == -1
+        own = np.arange(offset, offset + n, dtype=np.int32)
+
+        feature.append(np.where(is_leaf, 0, t.feature).astype(np.int32))
+        threshold.append(np.where(is_leaf, np.inf, t.threshold).astype(dtype))
+        children.append(np.column_stack([np.where(is_leaf, own, t.children_left + offset),
+                                         np.where(is_leaf, own, t.children_right + offset)]).astype(np.int32))
+        leaf_value = t.value[:, 0, :]   # (n_nodes, n_classes), a single column for regressors
+        if normalize:
+            # Class counts (or fractions) per node -> probabilities
+            leaf_value = leaf_value / leaf_value.sum(axis=1, keepdims=True)
+        value.append(leaf_value.astype(dtype))
+
+        roots.append(offset)
+        offset += n
+        max_depth = max(max_depth, t.max_depth)
+
+    return (np.concatenate(feature), np.concatenate(threshold), np.concatenate(children),
+            np.concatenate(value), np.array(roots, dtype=np.int32), max_depth)
+
+
+def compile_ensemble(model, float32=False):
+    """Flatten a fitted sklearn GradientBoostingRegressor or random forest.
+
+    ``float32=True`` stores thresholds and node values in float32, halving
+    their memory. Inputs are compared as float32 either way, like sklearn.
+    """
+    from sklearn.ensemble import (GradientBoostingRegressor, RandomForestClassifier,
+                                  RandomForestRegressor)
+
+    dtype = np.float32 if float32 else np.float64
+    n_features = model.n_features_in_
+
+    if isinstance(model, GradientBoostingRegressor):
+        trees = model.estimators_[:, 0]
+        arrays = _flatten(trees, normalize=False, dtype=dtype)
+        if model.init_ == 'zero':
+            base = np.zeros(1)
+        else:
+            base = np.asarray(model.init_.predict(np.zeros((1, n_features))), dtype=np.float64).reshape(1)
+        return CompiledForest(*arrays, base=base, scale=model.learning_rate, n_features=n_features)
+
+    if isinstance(model, RandomForestClassifier):
+        if model.n_outputs_ != 1:
+            raise ValueError("Only single-output classifiers can be compiled.")
+        arrays = _flatten(model.estimators_, normalize=True, dtype=dtype)
+        return CompiledForest(*arrays, base=np.zeros(len(model.classes_)), scale=1.0 / len(model.estimators_),
+                              n_features=n_features, classes=np.asarray(model.classes_))
+
+    if isinstance(model, RandomForestRegressor):
+        arrays = _flatten(model.estimators_, normalize=False, dtype=dtype)
+        return CompiledForest(*arrays, base=np.zeros(1), scale=1.0 / len(model.estimators_),
+                              n_features=n_features)
+
+    raise TypeError(f"Cannot compile {type(model).__name__}")
+
+
+def check_parity(model, compiled, X, rtol=1e-6, atol=1e-6):
+    """Max absolute difference between sklearn and the compiled ensemble.
+
+    Raises AssertionError when outputs differ beyond the tolerances.
+    """
+    if compiled.classes_ is None:
+        expected, actual = model.predict(X), compiled.predict(X)
+    else:
+        expected, actual = model.predict_proba(X), compiled.predict_proba(X)
+    np.testing.assert_allclose(actual, expected, rtol=rtol, atol=atol)
+    return float(np.max(np.abs(actual - expected)))
+
+
+def main(argv=None):
+    from model_registry import get_registry
+
+    parser = argparse.ArgumentParser(description="Export a served tree ensemble to flat NumPy node arrays.")
+    parser.add_argument("model", help="Registry name (flight_price, customer_satisfaction) or an MLflow model URI.")
+    parser.add_argument("output", help="Destination .npz file.")
+    parser.add_argument("--float32", action="store_true", help="Store thresholds and values as float32.")
+    args = parser.parse_args(argv)
+
+    registry = get_registry()
+    model = registry.get(args.model) if args.model in registry.names() else registry.load(args.model)
+    compiled = compile_ensemble(model, float32=args.float32)
+    compiled.save(args.output)
+    print(f"Wrote {len(compiled.roots)} trees ({len(compiled.feature)} nodes, "
+          f"{compiled.nbytes / 1e6:.1f} MB) to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())